@@ -0,0 +1,165 @@
+import argparse
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+import matplotlib
+
+matplotlib.use('Agg')
+
+from data_loader import DATA_FILE, read_categories
+from data_manage import StoryTelling
+from histogram_pyramid import SCALES
+
+ATTRIBUTES = ['subscribers', 'video views', 'uploads', 'average_monthly_earnings']
+HISTOGRAM_ATTRIBUTES = ['subscribers', 'video views', 'average_monthly_earnings']
+YEARS = [str(year) for year in range(2005, 2023)]
+
+
+class ExportController:
+    """
+        Stand-in for YouTubeController that saves graphs to files instead of
+        displaying them, so StoryTelling can run without a window.
+
+        Attributes:
+            output: Directory the graphs are saved to.
+            formats: File formats the graphs are saved as, for example ['png', 'svg'].
+            name: File name without extension of the graph being created.
+    """
+
+    def __init__(self, output, formats):
+        """
+        Initialize an ExportController object.
+        :param output: Directory the graphs are saved to.
+        :param formats: File formats the graphs are saved as.
+        """
+        self.output = output
+        self.formats = formats
+        self.name = None
+
+    def save_graph(self, fig):
+        """
+        Save the graph in every format.
+        :param fig: The matplotlib figure object.
+        :return: None
+        """
+        for file_format in self.formats:
+            fig.savefig(os.path.join(self.output, f'{self.name}.{file_format}'),
+                        format=file_format)
+
+    show_graph = save_graph
+    show_create_graph = save_graph
+    show_suggest_graph = save_graph
+
+
+def file_name(*parts):
+    """
+    Create a file name from parts of a graph name.
+    :param parts: Parts of the name.
+    :return: File name without extension.
+    """
+    return '_'.join(re.sub(r'[^A-Za-z0-9]+', '-', str(part)).strip('-') for part in parts)
+
+
+def chart_grid(categories, bins=(None,), scales=SCALES):
+    """
+    List every graph of the application.
+    :param categories: Categories to create suggest graphs for.
+    :param bins: Numbers of bins to create histograms with, None for automatic.
+    :param scales: Scales to create histograms with, 'linear' or 'log'.
+    :return: List of (file name, StoryTelling method name, arguments).
+    """
+    grid = [(file_name('story', 'default'), 'default_story_graph', ()),
+            (file_name('story', 'correlation'), 'first_story', (None,)),
+            (file_name('story', 'year trend'), 'second_story', (None,)),
+            (file_name('story', 'average earning'), 'third_story', (None,))]
+    grid += [(file_name('histogram', attribute, count or 'auto', scale), 'create_histogram',
+              (attribute, count, scale))
+             for attribute in HISTOGRAM_ATTRIBUTES for count in bins for scale in scales]
+    grid += [(file_name('scatter', x, y), 'create_scatter', (x, y))
+             for x in ATTRIBUTES for y in ATTRIBUTES]
+    grid += [(file_name('pie', year), 'create_pie', (year,)) for year in YEARS]
+    grid += [(file_name('bar', attribute), 'create_bar', (attribute,)) for attribute in ATTRIBUTES]
+    for category in categories:
+        grid.append((file_name('suggest', 'subscribers', category),
+                     'create_suggest_bar_sub', (category,)))
+        grid.append((file_name('suggest', 'video views', category),
+                     'create_suggest_bar_view', (category,)))
+    return grid
+
+
+def bins_argument(text):
+    """
+    Read a number of bins from the command line.
+    :param text: 'auto' or a positive number.
+    :return: The number, or None for 'auto'.
+    """
+    if text == 'auto':
+        return None
+    bins = int(text)
+    if bins < 1:
+        raise argparse.ArgumentTypeError('bins must be at least 1')
+    return bins
+
+
+_story = None
+
+
+def init_worker(output, formats, streaming):
+    """
+    Load the data once in each worker process.
+    :param output: Directory the graphs are saved to.
+    :param formats: File formats the graphs are saved as.
+    :param streaming: If True, load the data in streaming mode.
+    :return: None
+    """
+    global _story
+    _story = StoryTelling(ExportController(output, formats), streaming)
+
+
+def export_chart(name, method, args):
+    """
+    Create and save one graph in a worker process.
+    :param name: File name without extension.
+    :param method: StoryTelling method name.
+    :param args: Arguments of the method.
+    :return: The file name.
+    """
+    _story.controller.name = name
+    getattr(_story, method)(*args)
+    return name
+
+
+def main(argv=None):
+    """
+    Save every graph of the application to files using a pool of processes.
+    :param argv: Command line arguments, or None to use sys.argv.
+    :return: None
+    """
+    parser = argparse.ArgumentParser(description='Save every graph of YouTube Trend Analysis')
+    parser.add_argument('--output', default='exports', help='directory to save graphs to')
+    parser.add_argument('--format', dest='formats', action='append', choices=['png', 'svg'],
+                        help='file format, can be given more than once (default: png)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='number of processes (default: number of CPUs)')
+    parser.add_argument('--streaming', action='store_true',
+                        help='read the dataset in chunks and keep only aggregates in memory')
+    parser.add_argument('--bins', action='append', type=bins_argument,
+                        help='number of bins of histograms or auto, can be given more than once '
+                             '(default: auto)')
+    parser.add_argument('--scale', dest='scales', action='append', choices=SCALES,
+                        help='scale of histograms, can be given more than once (default: both)')
+    args = parser.parse_args(argv)
+    formats = args.formats or ['png']
+    os.makedirs(args.output, exist_ok=True)
+
+    # the workers load the data, here only the categories are needed
+    grid = chart_grid(read_categories(DATA_FILE), args.bins or [None], args.scales or SCALES)
+    with ProcessPoolExecutor(args.workers, initializer=init_worker,
+                             initargs=(args.output, formats, args.streaming)) as pool:
+        for name in pool.map(export_chart, *zip(*grid)):
+            print(f'saved {name}')
+    print(f'{len(grid)} graphs saved to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
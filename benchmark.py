@@ -0,0 +1,256 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+import matplotlib
+
+matplotlib.use('Agg')
+
+from data_loader import DATA_FILE, read_csv
+from data_manage import StoryTelling
+from render_cache import figure_to_rgba
+
+try:
+    import resource
+except ImportError:
+    # Unix only, peak RSS is not reported on Windows
+    resource = None
+
+SIZES = [1000, 10000, 100000, 1000000, 10000000]
+BASELINE_FILE = 'benchmark_baseline.json'
+
+
+class BenchmarkController:
+    """
+        Stand-in for YouTubeController that draws graphs off screen like the
+        application does, then throws them away.
+
+        Attributes:
+            graphs: Number of graphs drawn.
+    """
+
+    def __init__(self):
+        """
+        Initialize a BenchmarkController object.
+        """
+        self.graphs = 0
+
+    def draw_graph(self, fig):
+        """
+        Draw the graph to an RGBA array.
+        :param fig: The matplotlib figure object.
+        :return: None
+        """
+        figure_to_rgba(fig)
+        self.graphs += 1
+
+    show_graph = draw_graph
+    show_create_graph = draw_graph
+    show_suggest_graph = draw_graph
+
+
+def scaled_frame(raw, rows, seed=0):
+    """
+    Resample rows of the raw csv data to the wanted size.
+    :param raw: DataFrame of raw YouTube data.
+    :param rows: Number of rows.
+    :param seed: Seed of the sample.
+    :return: DataFrame of raw YouTube data with the given number of rows.
+    """
+    return raw.sample(n=rows, replace=True, random_state=seed, ignore_index=True)
+
+
+def benchmarks(story, raw):
+    """
+    List the benchmarks in the order they run. Each one depends on the data
+    left by the ones before it, like the application startup. Graphs are
+    created from empty caches, so every run and the allocation run measure the
+    aggregates, histogram pyramids, densities, fits and top channels they need,
+    not only drawing.
+    :param story: StoryTelling object with a BenchmarkController.
+    :param raw: DataFrame of raw YouTube data.
+    :return: List of (name, setup, run), setup is called before each run and is not timed.
+    """
+    def reset_raw():
+        story.youtube_data = raw.copy()
+
+    def reset_cleaned():
+        story.youtube_data = cleaned.copy()
+
+    def clean():
+        nonlocal cleaned
+        story.clean_data()
+        cleaned = story.youtube_data
+
+    cleaned = None
+    category = str(raw['category'].mode()[0])
+    cold = story.data_changed
+    return [('clean_data', reset_raw, clean),
+            ('find_average_earning', reset_cleaned, story.find_average_earning),
+            ('year_trend', cold, lambda: story.cube.year_trend),
+            ('remove_outliers', lambda: story.cube,
+             lambda: story.remove_outliers('average_monthly_earnings')),
+            ('create_histogram', cold, lambda: story.create_histogram('subscribers')),
+            ('create_scatter', cold,
+             lambda: story.create_scatter('subscribers', 'video views')),
+            ('create_pie', cold, lambda: story.create_pie('2015')),
+            ('create_bar', cold, lambda: story.create_bar('subscribers')),
+            ('create_suggest_bar_sub', cold, lambda: story.create_suggest_bar_sub(category)),
+            ('create_suggest_bar_view', cold, lambda: story.create_suggest_bar_view(category))]
+
+
+def peak_rss():
+    """
+    Get the peak resident set size of this process.
+    :return: Peak RSS in bytes, or None where the resource module is missing.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def measure(setup, run, repeat, allocations):
+    """
+    Time a benchmark, then run it once more with tracemalloc to count allocations.
+    :param setup: Function called before each run, or None.
+    :param run: Function to measure.
+    :param repeat: Number of timed runs, the fastest is reported.
+    :param allocations: If True, measure allocated memory.
+    :return: Dict of the measurements, peak RSS only where the resource module exists.
+    """
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    result = {'wall_time': min(times)}
+    rss = peak_rss()
+    if rss is not None:
+        result['peak_rss'] = rss
+    if allocations:
+        if setup is not None:
+            setup()
+        tracemalloc.start()
+        try:
+            run()
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        result['allocated'] = current
+        result['peak_allocated'] = peak
+    return result
+
+
+def run_size(rows, repeat, allocations, seed):
+    """
+    Run every benchmark on data of one size. This is run in a new process,
+    so peak RSS is not affected by larger sizes run before.
+    :param rows: Number of rows.
+    :param repeat: Number of timed runs of each benchmark.
+    :param allocations: If True, measure allocated memory.
+    :param seed: Seed of the resampled data.
+    :return: Dict of benchmark name to measurements.
+    """
+    story = StoryTelling(BenchmarkController())
+    raw = scaled_frame(read_csv(DATA_FILE), rows, seed)
+    results = {}
+    for name, setup, run in benchmarks(story, raw):
+        results[name] = measure(setup, run, repeat, allocations)
+    return results
+
+
+def compare(results, baseline, tolerance, min_time):
+    """
+    Find benchmarks that are slower than the baseline.
+    :param results: Results of this run.
+    :param baseline: Results of the baseline run.
+    :param tolerance: Allowed ratio of wall time to baseline wall time.
+    :param min_time: Benchmarks faster than this in the baseline are too noisy to compare.
+    :return: List of (rows, benchmark name, ratio) of regressions.
+    """
+    regressions = []
+    for rows, benches in results['results'].items():
+        for name, result in benches.items():
+            base = baseline['results'].get(rows, {}).get(name)
+            if base is None or base['wall_time'] < min_time:
+                continue
+            ratio = result['wall_time'] / base['wall_time']
+            if ratio > tolerance:
+                regressions.append((rows, name, ratio))
+    return regressions
+
+
+def main(argv=None):
+    """
+    Run the benchmarks and compare them with the stored baseline.
+    :param argv: Command line arguments, or None to use sys.argv.
+    :return: Exit code, 1 if a benchmark is slower than the baseline.
+    """
+    parser = argparse.ArgumentParser(description='Benchmark the StoryTelling data layer')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES,
+                        help='numbers of rows (default: 1k to 10M)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='timed runs of each benchmark, the fastest is reported')
+    parser.add_argument('--no-allocations', dest='allocations', action='store_false',
+                        help='do not measure allocations with tracemalloc')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the resampled data')
+    parser.add_argument('--output', help='file to save the results to as JSON')
+    parser.add_argument('--baseline', default=BASELINE_FILE,
+                        help=f'results to compare with (default: {BASELINE_FILE})')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='save the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=1.5,
+                        help='wall time ratio to the baseline that is a regression')
+    parser.add_argument('--min-time', type=float, default=0.01,
+                        help='seconds a benchmark must take in the baseline to be compared')
+    args = parser.parse_args(argv)
+
+    results = {'python': platform.python_version(),
+               'machine': platform.machine(),
+               'cpus': os.cpu_count(),
+               'results': {}}
+    context = multiprocessing.get_context('spawn')
+    for rows in args.sizes:
+        with ProcessPoolExecutor(1, mp_context=context) as pool:
+            benches = pool.submit(run_size, rows, args.repeat, args.allocations,
+                                  args.seed).result()
+        results['results'][str(rows)] = benches
+        for name, result in benches.items():
+            line = f'{rows:>10} {name:<24} {result["wall_time"]:>9.4f} s'
+            if 'peak_rss' in result:
+                line += f' {result["peak_rss"] / 2 ** 20:>9.1f} MB RSS'
+            if 'peak_allocated' in result:
+                line += f' {result["peak_allocated"] / 2 ** 20:>9.1f} MB allocated'
+            print(line)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        return 0
+
+    try:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        print(f'no baseline {args.baseline}, run with --save-baseline to store one')
+        return 0
+    regressions = compare(results, baseline, args.tolerance, args.min_time)
+    for rows, name, ratio in regressions:
+        print(f'regression: {name} on {rows} rows is {ratio:.2f}x slower than the baseline')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
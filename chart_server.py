@@ -0,0 +1,387 @@
+import argparse
+import asyncio
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+import matplotlib
+
+matplotlib.use('Agg')
+
+from batch_export import ATTRIBUTES, HISTOGRAM_ATTRIBUTES, YEARS
+from histogram_pyramid import SCALES
+from render_cache import RenderCache, figure_to_png
+
+# query parameters of each graph, in the order they are passed to the StoryTelling method
+CHARTS = {'default_story_graph': [],
+          'first_story': [],
+          'second_story': [],
+          'third_story': [],
+          'create_histogram': ['attribute', 'bins', 'scale'],
+          'create_scatter': ['x', 'y'],
+          'create_pie': ['year'],
+          'create_bar': ['attribute'],
+          'create_suggest_bar_sub': ['category'],
+          'create_suggest_bar_view': ['category']}
+
+# story methods are button handlers that take an event
+STORY_CHARTS = ['first_story', 'second_story', 'third_story']
+
+AGGREGATES = {'categories': [],
+              'year_trend': [],
+              'describe': ['category'],
+              'category_counts': ['year'],
+              'category_means': ['attribute'],
+              'top_channels': ['category', 'column']}
+
+# allowed values of parameters, categories are checked against the data by the worker
+CHOICES = {('create_histogram', 'attribute'): HISTOGRAM_ATTRIBUTES,
+           ('create_histogram', 'scale'): SCALES,
+           ('create_scatter', 'x'): ATTRIBUTES,
+           ('create_scatter', 'y'): ATTRIBUTES,
+           ('create_pie', 'year'): YEARS,
+           ('create_bar', 'attribute'): ATTRIBUTES,
+           ('category_counts', 'year'): YEARS,
+           ('category_means', 'attribute'): ATTRIBUTES,
+           ('top_channels', 'column'): ['subscribers', 'video views']}
+
+# parameters that may be left out
+OPTIONAL = {('describe', 'category'),
+            ('create_histogram', 'bins'),
+            ('create_histogram', 'scale')}
+
+
+class ServerController:
+    """
+        Stand-in for YouTubeController that keeps the last graph as PNG bytes,
+        so StoryTelling can create graphs for HTTP responses.
+
+        Attributes:
+            image: PNG bytes of the last graph, or None.
+    """
+
+    def __init__(self):
+        """
+        Initialize a ServerController object.
+        """
+        self.image = None
+
+    def keep_graph(self, fig):
+        """
+        Rasterize the graph to PNG bytes.
+        :param fig: The matplotlib figure object.
+        :return: None
+        """
+        self.image = figure_to_png(fig)
+
+    show_graph = keep_graph
+    show_create_graph = keep_graph
+    show_suggest_graph = keep_graph
+
+
+_story = None
+
+
+def init_worker(streaming, compact, store, snapshot):
+    """
+    Load the data once in each worker process.
+    :param streaming: If True, load the data in streaming mode.
+    :param compact: If True, keep the data in smaller dtypes.
+    :param store: Directory of a ColumnStore to open, or None to read the csv file.
+    :param snapshot: Name of the snapshot to open, or None for the latest one.
+    :return: None
+    """
+    global _story
+    from data_manage import StoryTelling
+    column_store = None
+    if store is not None:
+        from column_store import ColumnStore
+        column_store = ColumnStore(store)
+    _story = StoryTelling(ServerController(), streaming, compact, column_store, snapshot)
+
+
+def check_category(category):
+    """
+    Check that a category is in the data.
+    :param category: The category, or None.
+    :return: None
+    """
+    if category is not None and category not in _story.cube.categories:
+        raise ValueError(f'unknown category {category!r}')
+
+
+def render_chart(method, args):
+    """
+    Create one graph in a worker process.
+    :param method: StoryTelling method name.
+    :param args: Arguments of the method.
+    :return: PNG bytes of the graph.
+    """
+    if method in ('create_suggest_bar_sub', 'create_suggest_bar_view'):
+        check_category(args[0])
+    if method in STORY_CHARTS:
+        args = (None,)
+    _story.controller.image = None
+    getattr(_story, method)(*args)
+    return _story.controller.image
+
+
+def compute_aggregate(name, args):
+    """
+    Find the data a graph is created from in a worker process.
+    :param name: Name of the aggregate in AGGREGATES.
+    :param args: Values of its parameters.
+    :return: JSON bytes.
+    """
+    cube = _story.cube
+    if name == 'categories':
+        return json.dumps(list(cube.categories)).encode()
+    if name == 'year_trend':
+        result = cube.year_trend.to_json(orient='records')
+    elif name == 'describe':
+        check_category(args[0])
+        result = _story.stats.describe(args[0]).to_json(orient='index')
+    elif name == 'category_counts':
+        result = cube.category_counts(int(args[0])).to_json()
+    elif name == 'category_means':
+        result = cube.category_means[args[0]].to_json()
+    else:
+        check_category(args[0])
+        top = _story.top_channels(args[0], args[1])
+        result = top[['Youtuber', 'category', args[1]]].to_json(orient='records')
+    return result.encode()
+
+
+def parse_args(name, params, query):
+    """
+    Read the parameters of a graph or aggregate from the query string.
+    :param name: Name of the graph or aggregate.
+    :param params: Names of its parameters.
+    :param query: Dict of query string parameter to list of values.
+    :return: Tuple of values, in the order of params.
+    """
+    values = []
+    for param in params:
+        if param not in query:
+            if (name, param) in OPTIONAL:
+                values.append(None)
+                continue
+            raise ValueError(f'missing parameter {param!r}')
+        value = query[param][-1]
+        choices = CHOICES.get((name, param))
+        if choices is not None and value not in choices:
+            raise ValueError(f'{param} must be one of {", ".join(choices)}')
+        values.append(value)
+    return tuple(values)
+
+
+class ChartServer:
+    """
+        Local HTTP server of the graphs as PNG and the aggregates as JSON.
+        Graphs are created in a pool of processes, each with its own copy of
+        the data. Concurrent requests for the same response wait for one
+        computation (single flight), and responses are kept in a RenderCache,
+        since the data does not change while the server runs.
+
+        Attributes:
+            pool: ProcessPoolExecutor that creates the responses.
+            cache: RenderCache of response bodies.
+            in_flight: Dict of key to the asyncio future of a response being created.
+            computed: Number of responses created by the pool.
+            coalesced: Number of requests that waited for a response another request started.
+    """
+
+    def __init__(self, pool, cache_bytes=256 * 1024 * 1024):
+        """
+        Initialize a ChartServer object.
+        :param pool: ProcessPoolExecutor with workers started by init_worker.
+        :param cache_bytes: Maximum total size of cached responses.
+        """
+        self.pool = pool
+        self.cache = RenderCache(cache_bytes)
+        self.in_flight = {}
+        self.computed = 0
+        self.coalesced = 0
+
+    async def fetch(self, key, function, *args):
+        """
+        Get a response from the cache, from a computation already running,
+        or by running the function in the pool.
+        :param key: Hashable key of the response.
+        :param function: Function run in a worker to create the response.
+        :param args: Arguments of the function.
+        :return: Response body bytes.
+        """
+        body = self.cache.get(key)
+        if body is not None:
+            return body
+        future = self.in_flight.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self.pool, function, *args)
+            self.in_flight[key] = future
+            future.add_done_callback(lambda done: self.finish(key, done))
+            self.computed += 1
+        else:
+            self.coalesced += 1
+        # a client that disconnects must not cancel the response other clients wait for
+        return await asyncio.shield(future)
+
+    def finish(self, key, future):
+        """
+        Cache a created response and stop coalescing requests into it.
+        :param key: Key of the response.
+        :param future: The finished future.
+        :return: None
+        """
+        del self.in_flight[key]
+        if not future.cancelled() and future.exception() is None:
+            self.cache.put(key, future.result())
+
+    def stats(self):
+        """
+        Get counters of the server.
+        :return: Dict of counter name to value.
+        """
+        return {'computed': self.computed, 'coalesced': self.coalesced,
+                'cache_hits': self.cache.hits, 'cache_misses': self.cache.misses,
+                'cached': len(self.cache), 'cached_bytes': self.cache.current_bytes,
+                'in_flight': len(self.in_flight)}
+
+    async def respond(self, path, query):
+        """
+        Create the response to a GET request.
+        :param path: Path of the URL.
+        :param query: Dict of query string parameter to list of values.
+        :return: (HTTPStatus, content type, body bytes).
+        """
+        if path in ('/', '/charts'):
+            index = {'charts': {f'/chart/{name}.png': params for name, params in CHARTS.items()},
+                     'aggregates': {f'/aggregate/{name}.json': params
+                                    for name, params in AGGREGATES.items()}}
+            return HTTPStatus.OK, 'application/json', json.dumps(index).encode()
+        if path == '/stats':
+            return HTTPStatus.OK, 'application/json', json.dumps(self.stats()).encode()
+        kind, _, file_name = path.strip('/').partition('/')
+        name, _, extension = file_name.partition('.')
+        if kind == 'chart' and extension == 'png' and name in CHARTS:
+            args = parse_args(name, CHARTS[name], query)
+            body = await self.fetch(('chart', name, args), render_chart, name, args)
+            return HTTPStatus.OK, 'image/png', body
+        if kind == 'aggregate' and extension == 'json' and name in AGGREGATES:
+            args = parse_args(name, AGGREGATES[name], query)
+            body = await self.fetch(('aggregate', name, args), compute_aggregate, name, args)
+            return HTTPStatus.OK, 'application/json', body
+        return HTTPStatus.NOT_FOUND, 'text/plain', b'not found'
+
+    async def handle_connection(self, reader, writer):
+        """
+        Answer HTTP/1.1 requests of a connection until the client closes it.
+        :param reader: asyncio StreamReader of the connection.
+        :param writer: asyncio StreamWriter of the connection.
+        :return: None
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    field, _, value = line.decode('latin-1').partition(':')
+                    headers[field.strip().lower()] = value.strip()
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    break
+                # bodies of other methods are not read, so their connection is closed
+                keep_alive = (headers.get('connection', '').lower() != 'close'
+                              and version == 'HTTP/1.1' and method in ('GET', 'HEAD'))
+                status, content_type, body = await self.answer(method, target)
+                writer.write((f'{version} {status.value} {status.phrase}\r\n'
+                              f'Content-Type: {content_type}\r\n'
+                              f'Content-Length: {len(body)}\r\n'
+                              f'Connection: {"keep-alive" if keep_alive else "close"}\r\n'
+                              f'\r\n').encode('latin-1'))
+                if method != 'HEAD':
+                    writer.write(body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def answer(self, method, target):
+        """
+        Create the response to a request, turning errors into error responses.
+        :param method: HTTP method.
+        :param target: Request target, the path and query string.
+        :return: (HTTPStatus, content type, body bytes).
+        """
+        if method not in ('GET', 'HEAD'):
+            return HTTPStatus.METHOD_NOT_ALLOWED, 'text/plain', b'only GET is supported'
+        url = urlsplit(target)
+        try:
+            return await self.respond(url.path, parse_qs(url.query))
+        except ValueError as error:
+            return HTTPStatus.BAD_REQUEST, 'text/plain', str(error).encode()
+        except Exception as error:
+            return (HTTPStatus.INTERNAL_SERVER_ERROR, 'text/plain',
+                    f'{type(error).__name__}: {error}'.encode())
+
+    async def serve(self, host, port):
+        """
+        Serve requests until the task is cancelled.
+        :param host: Host name or address to listen on.
+        :param port: Port to listen on.
+        :return: None
+        """
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        async with server:
+            print(f'serving on http://{host}:{port}/')
+            await server.serve_forever()
+
+
+def main(argv=None):
+    """
+    Serve the graphs and aggregates over HTTP.
+    :param argv: Command line arguments, or None to use sys.argv.
+    :return: None
+    """
+    parser = argparse.ArgumentParser(description='Serve graphs of YouTube Trend Analysis '
+                                                 'as PNG and their data as JSON')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on')
+    parser.add_argument('--port', type=int, default=8000, help='port to listen on')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='number of processes creating graphs (default: number of CPUs)')
+    parser.add_argument('--cache-mb', type=int, default=256,
+                        help='memory for cached responses in megabytes')
+    parser.add_argument('--streaming', action='store_true',
+                        help='read the dataset in chunks and keep only aggregates in memory')
+    parser.add_argument('--compact', action='store_true',
+                        help='keep the data in smaller dtypes to use less memory')
+    parser.add_argument('--store', metavar='DIR',
+                        help='open a snapshot of a column store instead of the csv file, '
+                             'the workers share its memory-mapped pages')
+    parser.add_argument('--snapshot', metavar='NAME',
+                        help='snapshot of the store to open (default: the latest)')
+    args = parser.parse_args(argv)
+
+    with ProcessPoolExecutor(args.workers, initializer=init_worker,
+                             initargs=(args.streaming, args.compact, args.store,
+                                       args.snapshot)) as pool:
+        server = ChartServer(pool, args.cache_mb * 1024 * 1024)
+        try:
+            asyncio.run(server.serve(args.host, args.port))
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
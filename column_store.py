@@ -0,0 +1,188 @@
+import argparse
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+from data_loader import DATA_FILE, load_youtube_data
+
+STORE_VERSION = 1
+MANIFEST = 'store.json'
+
+# string columns kept as codes into one dictionary shared by every snapshot
+DICTIONARY_COLUMNS = ['Youtuber', 'category']
+
+
+def code_dtype(size):
+    """
+    Find the integer dtype pandas uses for codes of a categorical with this many
+    categories, so the codes can be used without converting them.
+    :param size: Number of categories.
+    :return: NumPy integer dtype.
+    """
+    for dtype in (np.int8, np.int16, np.int32):
+        if size < np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+class ColumnStore:
+    """
+        Directory of snapshots of cleaned YouTube data, one .npy file for each
+        column of each snapshot. Snapshots are opened as memory-mapped arrays, so
+        only the pages a graph reads are loaded, and several snapshots take no
+        memory until they are used. Strings are stored as codes into dictionaries
+        shared by every snapshot, since most channels appear in every export.
+
+        Attributes:
+            path: Path of the directory.
+            snapshots: Dict of snapshot name to its manifest entry, in the order added.
+            dictionaries: Dict of column name to Index of its distinct strings.
+    """
+
+    def __init__(self, path):
+        """
+        Open a store, or create an empty one if the directory has no store.
+        :param path: Path of the directory.
+        """
+        self.path = path
+        self.snapshots = {}
+        self.dictionaries = {column: pd.Index([], dtype=object) for column in DICTIONARY_COLUMNS}
+        manifest_path = os.path.join(path, MANIFEST)
+        if not os.path.exists(manifest_path):
+            return
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if manifest['version'] != STORE_VERSION:
+            raise ValueError(f'{path} is a store of version {manifest["version"]}, '
+                             f'not {STORE_VERSION}')
+        self.snapshots = manifest['snapshots']
+        for column in DICTIONARY_COLUMNS:
+            with open(self.dictionary_path(column), encoding='utf-8') as f:
+                self.dictionaries[column] = pd.Index(f.read().split('\n')[:-1], dtype=object)
+
+    def dictionary_path(self, column):
+        """
+        Get path of the file of the distinct strings of a column, one on each line.
+        :param column: Name of a DICTIONARY_COLUMNS column.
+        :return: Path of the file.
+        """
+        return os.path.join(self.path, f'{column}.dictionary.txt')
+
+    def names(self):
+        """
+        Get names of the snapshots.
+        :return: List of names, in the order they were added.
+        """
+        return list(self.snapshots)
+
+    def latest(self):
+        """
+        Get name of the snapshot added last.
+        :return: Name of the snapshot.
+        """
+        if not self.snapshots:
+            raise KeyError(f'{self.path} has no snapshots')
+        return self.names()[-1]
+
+    def encode(self, column, values):
+        """
+        Convert strings to codes, adding new strings to the dictionary of the column.
+        :param column: Name of a DICTIONARY_COLUMNS column.
+        :param values: Series of strings, missing values get code -1.
+        :return: Array of codes.
+        """
+        values = values.astype(object)
+        known = self.dictionaries[column]
+        new = pd.Index(values.dropna().unique()).difference(known, sort=False)
+        self.dictionaries[column] = known = known.append(new)
+        return known.get_indexer(values).astype(code_dtype(len(known)))
+
+    def add_snapshot(self, name, data):
+        """
+        Write a snapshot. The snapshot is written to a temporary directory first,
+        so a failed write leaves the store as it was.
+        :param name: Name of the snapshot, for example the month of the export.
+        :param data: Cleaned DataFrame, as load_youtube_data returns it.
+        :return: None
+        """
+        if name in self.snapshots:
+            raise ValueError(f'snapshot {name} already exists')
+        os.makedirs(self.path, exist_ok=True)
+        tmp_path = os.path.join(self.path, f'{name}.tmp')
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        columns = {}
+        for i, column in enumerate(data.columns):
+            if column in DICTIONARY_COLUMNS:
+                values = self.encode(column, data[column])
+            else:
+                values = data[column].to_numpy()
+            np.save(os.path.join(tmp_path, f'{i}.npy'), values)
+            columns[column] = str(values.dtype)
+        for column in DICTIONARY_COLUMNS:
+            self.write_text(self.dictionary_path(column),
+                            ''.join(f'{value}\n' for value in self.dictionaries[column]))
+        os.replace(tmp_path, os.path.join(self.path, name))
+        self.snapshots[name] = {'rows': len(data), 'columns': columns}
+        self.write_text(os.path.join(self.path, MANIFEST),
+                        json.dumps({'version': STORE_VERSION, 'snapshots': self.snapshots},
+                                   indent=2))
+
+    @staticmethod
+    def write_text(path, text):
+        """
+        Replace a text file at once, so readers never see half of it.
+        :param path: Path of the file.
+        :param text: Content of the file.
+        :return: None
+        """
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    def open(self, name):
+        """
+        Open a snapshot without reading it. Numbers and codes are read-only
+        memory-mapped arrays used by the DataFrame without copying.
+        :param name: Name of the snapshot.
+        :return: DataFrame of the snapshot.
+        """
+        snapshot_path = os.path.join(self.path, name)
+        columns = {}
+        for i, column in enumerate(self.snapshots[name]['columns']):
+            values = np.load(os.path.join(snapshot_path, f'{i}.npy'), mmap_mode='r')
+            if column in DICTIONARY_COLUMNS:
+                dtype = pd.CategoricalDtype(self.dictionaries[column])
+                values = pd.Categorical.from_codes(values, dtype=dtype, validate=False)
+                if column == 'category':
+                    # categories of other snapshots would show up in the graphs
+                    values = values.remove_unused_categories()
+            columns[column] = values
+        return pd.DataFrame(columns, copy=False)
+
+
+def main(argv=None):
+    """
+    Add a csv export to a store, or list the snapshots of a store.
+    :param argv: Command line arguments, or None to use sys.argv.
+    :return: None
+    """
+    parser = argparse.ArgumentParser(description='Keep snapshots of the YouTube data '
+                                                 'in a memory-mapped column store')
+    parser.add_argument('store', help='directory of the store')
+    parser.add_argument('name', nargs='?', help='name of the snapshot to add')
+    parser.add_argument('--source', default=DATA_FILE, help='csv file of the snapshot')
+    args = parser.parse_args(argv)
+
+    store = ColumnStore(args.store)
+    if args.name is not None:
+        store.add_snapshot(args.name, load_youtube_data(args.source, use_cache=False))
+        print(f'snapshot {args.name} added to {args.store}')
+    for name, snapshot in store.snapshots.items():
+        print(f'{name:<20}{snapshot["rows"]:>12} rows')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+class CrossFilter:
+    """
+        Filter of the channels every graph and the descriptive table show.
+        Each part is optional, and a channel is kept when it passes every part.
+
+        Attributes:
+            categories: Frozenset of categories to keep, or None for every category.
+            years: (first, last) created years to keep, both included, or None for
+                   every year. Either year can be None for no bound.
+            subscribers: (low, high) numbers of subscribers to keep, both included,
+                         or None for any number. Either number can be None for no bound.
+    """
+
+    def __init__(self, categories=None, years=None, subscribers=None):
+        """
+        Initialize a CrossFilter object.
+        :param categories: Iterable of categories to keep, or None for every category.
+        :param years: (first, last) created years to keep, or None for every year.
+        :param subscribers: (low, high) numbers of subscribers to keep, or None for any number.
+        """
+        self.categories = frozenset(categories) if categories is not None else None
+        self.years = self.bounds(years)
+        self.subscribers = self.bounds(subscribers)
+
+    @staticmethod
+    def bounds(pair):
+        """
+        Normalize a range, so a range without bounds is the same as no range.
+        :param pair: (low, high) or None.
+        :return: (low, high) tuple, or None if neither bound is set.
+        """
+        if pair is None:
+            return None
+        low, high = pair
+        if low is None and high is None:
+            return None
+        if low is not None and high is not None and low > high:
+            raise ValueError(f'range from {low} to {high} is empty')
+        return low, high
+
+    def is_empty(self):
+        """
+        Check whether the filter keeps every channel.
+        :return: True if no part of the filter is set.
+        """
+        return self.categories is None and self.years is None and self.subscribers is None
+
+    def keeps(self, rows):
+        """
+        Find the rows the filter keeps by comparing their columns, for new rows
+        that are not in the row indexes yet.
+        :param rows: DataFrame of cleaned YouTube data.
+        :return: Boolean array, True for rows the filter keeps.
+        """
+        # numpy is imported here, so importing the controller does not load it
+        import numpy as np
+        keep = np.ones(len(rows), dtype=bool)
+        if self.categories is not None:
+            keep &= rows['category'].isin(self.categories).to_numpy()
+        for column, bounds in (('created_year', self.years), ('subscribers', self.subscribers)):
+            if bounds is None:
+                continue
+            low, high = bounds
+            values = rows[column].to_numpy()
+            if low is not None:
+                keep &= values >= low
+            if high is not None:
+                keep &= values <= high
+        return keep
+
+    def key(self):
+        """
+        Create a hashable key of the filter, for caching graphs and aggregates.
+        :return: Tuple, or None for a filter that keeps every channel.
+        """
+        if self.is_empty():
+            return None
+        categories = tuple(sorted(self.categories)) if self.categories is not None else None
+        return categories, self.years, self.subscribers
+
+    def describe(self):
+        """
+        Describe the filter in a short text.
+        :return: Text like 'Music, Gaming | 2010-2015 | 1M-'.
+        """
+        if self.is_empty():
+            return 'All channels'
+        parts = []
+        if self.categories is not None:
+            parts.append(', '.join(sorted(self.categories)) or 'no category')
+        if self.years is not None:
+            parts.append('-'.join('' if year is None else str(year) for year in self.years))
+        if self.subscribers is not None:
+            parts.append('-'.join('' if number is None else f'{number / 1e6:g}M'
+                                  for number in self.subscribers) + ' subscribers')
+        return ' | '.join(parts)
@@ -0,0 +1,144 @@
+import pandas as pd
+from sketches import GroupedSketches
+
+CUBE_COLUMNS = ['subscribers', 'video views', 'uploads', 'average_monthly_earnings']
+QUANTILES = [0.25, 0.50, 0.75]
+
+
+class AggregateCube:
+    """
+        Pre-computed (year x category) aggregates of YouTube data, so charts
+        can be drawn without scanning the whole dataset on every click.
+
+        Attributes:
+            categories: Categories in order of first appearance.
+            counts: Number of channels for each (created_year, category).
+            sums: Sum of each numeric column for each (created_year, category).
+            mins: Minimum of each numeric column for each (created_year, category).
+            maxs: Maximum of each numeric column for each (created_year, category).
+            means: Mean of each numeric column for each (created_year, category).
+            quantiles: Quartiles of each numeric column for each (created_year, category, q).
+            sketches: GroupedSketches of the numeric columns for each category.
+            category_quantiles: Quartiles of each numeric column for each (category, q),
+                                estimated by the sketches.
+            year_trend: The most created category for each year.
+            category_means: Mean of each numeric column for each category.
+    """
+
+    def __init__(self, data=None):
+        """
+        Build every aggregate from the data in a single pass of groupby.
+        :param data: DataFrame containing cleaned YouTube data, or None
+                     to create an empty cube that is filled by from_partial.
+        """
+        self._category_year = {}
+        if data is None:
+            return
+        values = data[CUBE_COLUMNS].astype('float64')
+        keys = [data['created_year'], data['category']]
+        grouped = values.groupby(keys, observed=True)
+        self.categories = list(data['category'].unique())
+        self.counts = grouped.size()
+        self.sums = grouped.sum()
+        self.mins = grouped.min()
+        self.maxs = grouped.max()
+        self.quantiles = grouped.quantile(QUANTILES)
+        # exact quantiles can not be merged from cells, so keep sketches of categories
+        self.sketches = GroupedSketches(CUBE_COLUMNS)
+        self.sketches.update(data, 'category')
+        self.derive()
+
+    @classmethod
+    def from_partial(cls, partial):
+        """
+        Build the cube from mergeable aggregates, with quantiles estimated by sketches.
+        :param partial: PartialAggregate of the whole data.
+        :return: AggregateCube object.
+        """
+        cube = cls()
+        cube.categories = list(partial.categories)
+        cube.counts = partial.counts.sort_index()
+        cube.sums = partial.sums.sort_index()
+        cube.mins = partial.mins.sort_index()
+        cube.maxs = partial.maxs.sort_index()
+
+        cube.quantiles = cls.quantile_frame(partial.sketches, ['created_year', 'category'])
+        cube.sketches = partial.sketches.margin(1)
+        cube.derive()
+        return cube
+
+    @staticmethod
+    def quantile_frame(sketches, names):
+        """
+        Create a DataFrame of quartiles indexed like the result of groupby quantile.
+        :param sketches: GroupedSketches of the groups.
+        :param names: Names of the group key levels.
+        :return: DataFrame indexed by (*keys, q).
+        """
+        rows = {}
+        for (group, column), sketch in sketches.sketches.items():
+            key = group if isinstance(group, tuple) else (group,)
+            for q, value in zip(QUANTILES, sketch.quantile(QUANTILES)):
+                rows.setdefault((*key, q), {})[column] = value
+        frame = pd.DataFrame.from_dict(rows, orient='index', columns=CUBE_COLUMNS)
+        frame.index = pd.MultiIndex.from_tuples(frame.index, names=[*names, None])
+        return frame.sort_index()
+
+    def derive(self):
+        """
+        Compute the aggregates that are derived from counts and sums.
+        :return: None
+        """
+        self.means = self.sums.div(self.counts, axis=0)
+        self.category_quantiles = self.quantile_frame(self.sketches, ['category'])
+        category_sums = self.sums.groupby(level='category', observed=True).sum()
+        category_counts = self.counts.groupby(level='category', observed=True).sum()
+        self.category_means = category_sums.div(category_counts, axis=0)
+        self.year_trend = self.find_year_trend()
+        self._category_year = {}
+
+    def find_year_trend(self):
+        """
+        Find the most created category for each year.
+        :return: DataFrame with 'Year', 'Category' and 'total_created' columns.
+        """
+        result = []
+        for y, category_counts in self.counts.groupby(level='created_year', observed=True):
+            category_counts = category_counts.droplevel('created_year')
+            m = {'Year': y, 'Category': category_counts.idxmax(),
+                 'total_created': category_counts.max()}
+            result.append(m)
+        year_trend = pd.DataFrame(result, columns=['Year', 'Category', 'total_created'])
+        year_trend['Year'] = year_trend['Year'].astype(int)
+        return year_trend
+
+    def category_counts(self, year):
+        """
+        Get number of channels of each category created in the year.
+        :param year: The created year.
+        :return: Series of counts indexed by category, sorted ascending.
+        """
+        if year not in self._category_year:
+            years = self.counts.index.get_level_values('created_year')
+            counts = self.counts[years == year].droplevel('created_year')
+            self._category_year[year] = counts.sort_values(ascending=True)
+        return self._category_year[year]
+
+    def iqr_bounds(self, column):
+        """
+        Get the 1.5 IQR outlier bounds of a column for each category.
+        :param column: The numeric column name.
+        :return: DataFrame with 'lower' and 'upper' columns indexed by category.
+        """
+        q = self.category_quantiles[column].unstack().reindex(columns=QUANTILES)
+        iqr = q[0.75] - q[0.25]
+        return pd.DataFrame({'lower': q[0.25] - 1.5 * iqr, 'upper': q[0.75] + 1.5 * iqr})
+
+    def box_stats(self, column):
+        """
+        Get box plot statistics of a column for each category after removing outliers.
+        :param column: The numeric column name.
+        :return: List of dicts that can be passed to matplotlib Axes.bxp, sorted by category.
+        """
+        return [self.sketches.box_stats(category, column)
+                for category in sorted(self.sketches.groups())]
@@ -1,7 +1,21 @@
-import re
+import functools
+import threading
 import pandas as pd
+import matplotlib as mpl
+import numpy as np
 import seaborn as sns
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from binned_kde import binned_kde, draw_kde
+from data_state import DataState
+from histogram_pyramid import HistogramPyramid, draw_histogram
+from data_loader import (DATA_FILE, load_youtube_data, clean_frame, add_average_earning,
+                         compact_frame, memory_report)
+from stream_ingest import stream_csv
+from lod_scatter import LOD_THRESHOLD, draw_density_scatter
+from regression import draw_fit
+
+# number of filters whose aggregates are kept besides the current one
+FILTER_CACHE_SIZE = 8
 
 
 class StoryTelling:
@@ -10,18 +24,438 @@ class StoryTelling:
 
         Attributes:
             youtube_data: DataFrame containing YouTube data.
+            filtered_data: Rows of youtube_data the filter keeps.
             controller: The controller object for managing the GUI.
+            state: DataState of the data, the filter and their aggregates. Changing
+                   the data or the filter replaces it instead of changing it. In a
+                   method wrapped by pin, the state it was pinned to.
+            data_version: Counter increased every time youtube_data changes.
+            view_version: (data_version, filter key) of the graphs, for caching them.
+            data_filter: CrossFilter of the channels every graph and statistic shows,
+                         or None to show every channel.
+            filter_key: Key of data_filter, or None.
+            filter_states: Dict of filter key to the DataState of filters used before,
+                           so setting a filter again is instant.
+            cube: Pre-computed (year x category) aggregates of filtered_data.
+            partial: Aggregates of the whole file in streaming mode, otherwise None.
+            lod_threshold: Scatter plots with more rows than this are drawn as a density.
+            top_k: Number of top channels kept for each category.
+            top_index: TopKIndex of the channels of filtered_data with the largest
+                       values for each category.
+            stats: RunningStats of the numeric columns of filtered_data for each category.
+            compact: If True, youtube_data is kept in the smaller dtypes of compact_frame.
+            store: ColumnStore the data is opened from, or None.
+            snapshot: Name of the snapshot youtube_data is, or None if it is not a snapshot.
+            snapshot_states: Dict of (store path, snapshot name) to the filter_states
+                             of snapshots opened before, without their rows, so
+                             switching back does not build the aggregates again.
     """
 
-    def __init__(self, controller):
+    def __init__(self, controller, streaming=False, compact=False, store=None, snapshot=None):
         """
         Initialize a StoryTelling object.
         :param controller: The controller object for managing the GUI.
+        :param streaming: If True, read the file in chunks and keep only mergeable
+                          aggregates and a bounded sample of rows in youtube_data.
+        :param compact: If True, keep youtube_data in smaller dtypes, see compact_frame.
+        :param store: ColumnStore to open a snapshot of instead of reading the csv file.
+        :param snapshot: Name of the snapshot to open, or None for the latest one.
         """
-        self.youtube_data = pd.read_csv('Global YouTube Statistics.csv', encoding="latin-1")
+        self.compact = compact
+        self.store = None
+        self.snapshot = None
+        self.snapshot_states = {}
+        self.data_version = 0
+        self.filter_states = {}
+        self._state = None
+        self._local = threading.local()
+        self.partial = None
+        self.lod_threshold = LOD_THRESHOLD
+        self.top_k = 10
+        if streaming:
+            self.partial = stream_csv(DATA_FILE)
+            self.youtube_data = self.partial.sample_rows()
+        elif store is not None:
+            self.open_snapshot(store, snapshot or store.latest())
+        else:
+            self.youtube_data = load_youtube_data(DATA_FILE, compact=compact)
         self.controller = controller
-        self.clean_data()
-        self.find_average_earning()
+        self.state.cube
+        self.state.top_index
+
+    @property
+    def state(self):
+        """
+        DataState of the data, the filter and their aggregates.
+        """
+        state = getattr(self._local, 'state', None)
+        return state if state is not None else self._state
+
+    def pin(self, method):
+        """
+        Wrap a method of this object to use the current state wherever it runs,
+        so a graph created in a worker thread is not mixed from the data or the
+        filter set while it is created.
+        :param method: Bound StoryTelling method.
+        :return: Function with the name of the method.
+        """
+        state = self._state
+
+        @functools.wraps(method)
+        def pinned(*args):
+            self._local.state = state
+            try:
+                return method(*args)
+            finally:
+                self._local.state = None
+
+        return pinned
+
+    @property
+    def youtube_data(self):
+        """
+        DataFrame containing YouTube data.
+        """
+        return self.state.youtube_data
+
+    @youtube_data.setter
+    def youtube_data(self, data):
+        # in compact mode new data is made smaller in place before it is used
+        if self.compact:
+            compact_frame(data)
+        self.use_data(data)
+
+    def use_data(self, data):
+        """
+        Use new data with the current filter. Aggregates are built on next use,
+        and graphs still being created from the previous data keep using it.
+        :param data: DataFrame of cleaned YouTube data.
+        :return: None
+        """
+        self.data_version += 1
+        data_filter = self._state.data_filter if self._state is not None else None
+        self._state = DataState(data, self.data_version, self.partial, data_filter, self.top_k)
+        self.filter_states = {}
+        # changed data is no longer the snapshot it was opened from
+        self.snapshot = None
+
+    def open_snapshot(self, store, name):
+        """
+        Use a snapshot of a ColumnStore as the data. The snapshot is memory-mapped,
+        not read, and aggregates of snapshots opened before are used again. The
+        states of the previous snapshot are kept without their filtered rows and
+        row indexes, so they hold no copy of its rows.
+        :param store: The ColumnStore.
+        :param name: Name of the snapshot.
+        :return: None
+        """
+        if self.snapshot is not None:
+            states = dict(self.filter_states)
+            states[self._state.key] = self._state
+            indexes = {}
+            for state in states.values():
+                state.drop_rows(indexes)
+            self.snapshot_states[(self.store.path, self.snapshot)] = states
+        states = self.snapshot_states.pop((store.path, name), None)
+        if states is None:
+            # not compacted, that would copy the mapped columns into memory
+            self.use_data(store.open(name))
+        else:
+            state = states.pop(self._state.key, None)
+            if state is None:
+                state = next(iter(states.values())).with_filter(self._state.data_filter)
+            self._state = state
+            self.filter_states = states
+        self.store = store
+        self.snapshot = name
+
+    @property
+    def filtered_data(self):
+        """
+        Rows of youtube_data the filter keeps.
+        """
+        return self.state.filtered_data
+
+    @property
+    def data_filter(self):
+        """
+        CrossFilter of the channels every graph and statistic shows, or None.
+        """
+        return self.state.data_filter
+
+    @property
+    def filter_key(self):
+        """
+        Key of data_filter, or None.
+        """
+        return self.state.key
+
+    @property
+    def view_version(self):
+        """
+        Version of the data and the filter the graphs are created from.
+        """
+        return self.state.view_version
+
+    def set_filter(self, data_filter):
+        """
+        Show only the channels the filter keeps in every graph and statistic.
+        The state of the previous filter is kept, so going back to it does not
+        build its aggregates again. Only FILTER_CACHE_SIZE filters are kept
+        besides the one of every channel.
+        :param data_filter: CrossFilter, or None to show every channel.
+        :return: None
+        """
+        key = data_filter.key() if data_filter is not None else None
+        state = self._state
+        if key == state.key:
+            return
+        self.filter_states.pop(state.key, None)
+        self.filter_states[state.key] = state
+        filtered = [old for old in self.filter_states if old is not None]
+        for old in filtered[:-FILTER_CACHE_SIZE]:
+            del self.filter_states[old]
+        new_state = self.filter_states.pop(key, None)
+        self._state = new_state if new_state is not None else state.with_filter(data_filter)
+
+    def all_categories(self):
+        """
+        Get every category of the data, whatever the filter keeps.
+        :return: List of categories in order of first appearance.
+        """
+        state = self.state
+        if state.partial is not None:
+            return list(state.partial.categories)
+        return list(state.youtube_data['category'].unique())
+
+    def memory_report(self):
+        """
+        Compare the memory of each column of youtube_data with the memory it takes
+        as loaded without compact mode.
+        :return: DataFrame of memory_report.
+        """
+        return memory_report(self.youtube_data)
+
+    @property
+    def cube(self):
+        """
+        Aggregates of filtered_data, built on first use for each data and filter.
+        """
+        return self.state.cube
+
+    def regression_plot(self, x, y, ax, scatter_color, line_color):
+        """
+        Draw a scatter plot with a regression line and the 95% confidence band of
+        its mean, found in closed form instead of seaborn's bootstrap. When there are
+        more rows than lod_threshold, or in streaming mode, draw a binned density
+        with a sample of outlying points and the line of the whole data instead.
+        :param x: Column name of x axis.
+        :param y: Column name of y axis.
+        :param ax: The matplotlib axes to draw on.
+        :param scatter_color: Color of the points.
+        :param line_color: Color of the regression line.
+        :return: The matplotlib axes.
+        """
+        state = self.state
+        data = state.filtered_data
+        if len(data) <= self.lod_threshold and state.partial is None:
+            # x and y can be the same column
+            valid = data[x].notna() & data[y].notna()
+            x_values = data.loc[valid, x]
+            ax.scatter(x_values, data.loc[valid, y], color=scatter_color, alpha=.8,
+                       linewidths=mpl.rcParams['lines.markeredgewidth'])
+            if len(x_values):
+                draw_fit(ax, state.line_fit(x, y), x_values.min(), x_values.max(), line_color,
+                         linewidth=mpl.rcParams['lines.linewidth'] * 1.5)
+        else:
+            draw_density_scatter(ax, data[x], data[y], scatter_color, line_color,
+                                 state.line_fit(x, y))
+        ax.set_xlabel(x)
+        ax.set_ylabel(y)
+        return ax
+
+    def histogram_plot(self, column, ax, without_outliers=False, bandwidth=None, bins=None,
+                       scale='linear'):
+        """
+        Draw a histogram of the column with a kernel density curve, like
+        sns.histplot with kde=True. The bins are summed from a HistogramPyramid
+        and the density is estimated by binned_kde, both kept until the data or
+        the filter changes, so another bin count or scale does not read the values again.
+        :param column: The numeric column name.
+        :param ax: The matplotlib axes to draw on.
+        :param without_outliers: If True, leave out outliers of each category.
+        :param bandwidth: Standard deviation of the kernel, or None for Scott's rule.
+        :param bins: Number of bins, or None to choose it like numpy's 'auto' rule.
+        :param scale: 'linear', or 'log' for bins of equal width in log10 of the values.
+        :return: The matplotlib axes.
+        """
+        state = self.state
+        kept = 'without_outliers' if without_outliers else None
+        pyramid_key = (column, scale, kept)
+        density_key = (column, bandwidth, kept, scale)
+        with state.lock:
+            if pyramid_key not in state.pyramids or density_key not in state.densities:
+                data = self.remove_outliers(column) if without_outliers else state.filtered_data
+                values = data[column].dropna().to_numpy(dtype=np.float64)
+                if pyramid_key not in state.pyramids:
+                    state.pyramids[pyramid_key] = HistogramPyramid(values, scale)
+                if density_key not in state.densities:
+                    if scale == 'log':
+                        values = np.log10(values[values > 0])
+                    state.densities[density_key] = binned_kde(values, bandwidth)
+            pyramid = state.pyramids[pyramid_key]
+            curve = state.densities[density_key]
+        edges, counts = pyramid.histogram(bins)
+        draw_histogram(ax, edges, counts, 'red')
+        if scale == 'log':
+            ax.set_xscale('log')
+        if curve is not None:
+            grid, density = curve
+            width = pyramid.transform(edges[1]) - pyramid.transform(edges[0])
+            draw_kde(ax, pyramid.inverse(grid), density, pyramid.count * width, 'red')
+        ax.set_xlabel(column)
+        return ax
+
+    def box_plot(self, column, ax):
+        """
+        Draw a box plot of the column for each category without outliers, using
+        statistics estimated by the quantile sketches instead of sorting the rows.
+        Like seaborn, values left beyond the whiskers are drawn as fliers.
+        :param column: The numeric column name.
+        :param ax: The matplotlib axes to draw on.
+        :return: The matplotlib axes.
+        """
+        stats = self.cube.box_stats(column)
+        if stats:
+            line = {'color': '0.25'}
+            boxes = ax.bxp(stats, vert=False, patch_artist=True, widths=0.8,
+                           boxprops={'edgecolor': '0.25'}, medianprops=line,
+                           whiskerprops=line, capprops=line,
+                           flierprops={'markeredgecolor': '0.25', 'markersize': 5})
+            for patch, color in zip(boxes['boxes'], sns.color_palette('Reds', len(stats))):
+                patch.set_facecolor(color)
+        ax.invert_yaxis()
+        ax.set_xlabel(column)
+        ax.set_ylabel('category')
+        return ax
+
+    def top_channels(self, category, column, k=10):
+        """
+        Get the channels with the largest value of the column in the category.
+        :param category: The category of channels.
+        :param column: The column to rank channels by.
+        :param k: Number of channels.
+        :return: DataFrame of channels, sorted descending.
+        """
+        top = self.top_index.get(category, column, k)
+        if isinstance(top['Youtuber'].dtype, pd.CategoricalDtype):
+            # graphs would show a bar for every category of the column
+            top = top.astype({'Youtuber': object})
+        return top
+
+    @property
+    def top_index(self):
+        """
+        Top channels of each category, built on first use for each data and filter.
+        """
+        return self.state.top_index
+
+    def row_index(self, column):
+        """
+        Get the RowIndex of a column of youtube_data, kept until the data changes.
+        :param column: Name of the column, for example 'category' or 'created_year'.
+        :return: RowIndex object.
+        """
+        return self.state.row_index(column)
+
+    @property
+    def stats(self):
+        """
+        Descriptive statistics of each category, built on first use for each data
+        and filter.
+        """
+        return self.state.stats
+
+    def data_changed(self):
+        """
+        Mark youtube_data as changed, so every aggregate is rebuilt on next use.
+        Call this after modifying youtube_data in place.
+        :return: None
+        """
+        self.use_data(self._state.youtube_data)
+
+    def append_rows(self, rows):
+        """
+        Clean rows and append them to the data. Copies of the top channels index
+        and the descriptive statistics are updated with only the new rows the
+        filter keeps instead of being rebuilt.
+        :param rows: DataFrame of raw YouTube data.
+        :return: None
+        """
+        rows = clean_frame(rows)
+        add_average_earning(rows)
+        if self.partial is not None:
+            # a copy is updated, graphs being created keep reading the old aggregates,
+            # and the aggregates of a filter come from the sample rows drawn again
+            self.partial = self.partial.copy()
+            self.partial.update(rows)
+            self.youtube_data = self.partial.sample_rows()
+            return
+        state = self._state
+        top_index = state.top_index.copy()
+        stats = state.stats.copy()
+        data = pd.concat([state.youtube_data, rows], ignore_index=True)
+        data['category'] = data['category'].astype('category')
+        self.youtube_data = data
+        if state.data_filter is not None:
+            rows = rows[state.data_filter.keeps(rows)]
+        top_index.update(rows)
+        stats.update(rows)
+        self._state.top_index = top_index
+        self._state.stats = stats
+
+    def apply_delta(self, drop, rows):
+        """
+        Remove rows and append new raw rows, for example the changes of a reloaded
+        file. Only the new rows are cleaned. Removed values can not be taken out
+        of the top channels index and the statistics, so the categories of removed
+        rows are rebuilt, and the other new rows are added incrementally.
+        :param drop: Boolean array, True for rows of youtube_data to remove.
+        :param rows: DataFrame of raw YouTube data to append.
+        :return: None
+        """
+        if not drop.any():
+            self.append_rows(rows)
+            return
+        state = self._state
+        # copies are updated, graphs being created keep reading the old ones
+        top_index = state.top_index.copy()
+        stats = state.stats.copy()
+        affected = set(state.youtube_data.loc[drop, 'category'].astype(object))
+        rows = clean_frame(rows)
+        add_average_earning(rows)
+        parts = [state.youtube_data[~drop]] + ([rows] if len(rows) else [])
+        data = pd.concat(parts, ignore_index=True)
+        data['category'] = data['category'].astype('category')
+        self.youtube_data = data
+
+        new_state = self._state
+        categories, years, subscribers = affected, None, None
+        data_filter = new_state.data_filter
+        if data_filter is not None:
+            if data_filter.categories is not None:
+                categories = affected & data_filter.categories
+            years, subscribers = data_filter.years, data_filter.subscribers
+        rebuilt = new_state.take_rows(new_state.filter_rows(categories, years, subscribers))
+        added = rows[~rows['category'].isin(affected)]
+        if data_filter is not None:
+            added = added[data_filter.keeps(added)]
+        top_index.replace_categories(rebuilt, affected)
+        top_index.update(added)
+        stats.replace_categories(rebuilt, affected)
+        stats.update(added)
+        new_state.top_index = top_index
+        new_state.stats = stats
 
     def clean_data(self):
         """
@@ -31,27 +465,30 @@ class StoryTelling:
             - Removing character that are not letters
         :return: None
         """
-        # fill missing category with 'Other'
-        if self.youtube_data['category'].isnull().any():
-            self.youtube_data['category'] = self.youtube_data['category'].fillna('Other')
-
-        # drop row that created_year is missing
-        self.youtube_data.dropna(subset=['created_year'], inplace=True)
-
-        # drop row that created_year is 1970 because YouTube is created in 2005
-        self.youtube_data = self.youtube_data[self.youtube_data['created_year'] != 1970]
-
-        # Remove any characters that are not letters
-        to_re = r'[^a-zA-Z]'
-        self.youtube_data['Youtuber'] = self.youtube_data['Youtuber'].apply(lambda x: re.sub(to_re, '', x))
+        self.youtube_data = clean_frame(self.youtube_data)
 
     def find_average_earning(self):
         """
         Calculate average monthly earning
         :return: None
         """
-        self.youtube_data['average_monthly_earnings'] = (self.youtube_data['highest_monthly_earnings'] +
-                                                         self.youtube_data['lowest_monthly_earnings']) / 2
+        add_average_earning(self.youtube_data)
+        self.data_changed()
+
+    def remove_outliers(self, column):
+        """
+        Remove outliers of the column for each category using 1.5 IQR rule.
+        :param column: The numeric column name.
+        :return: DataFrame with 'category' and the column without outliers.
+        """
+        state = self.state
+        bounds = state.cube.iqr_bounds(column)
+        data = state.filtered_data
+        category = data['category']
+        values = data[column].to_numpy()
+        lower = bounds['lower'].reindex(category).to_numpy()
+        upper = bounds['upper'].reindex(category).to_numpy()
+        return data.loc[(values >= lower) & (values <= upper), ['category', column]]
 
     def default_story_graph(self):
         """
@@ -62,35 +499,13 @@ class StoryTelling:
             - Histogram
         :return: None
         """
-        year = self.youtube_data['created_year'].unique()
-        year = sorted(year)
-
-        result = []
-        for i, y in enumerate(year):
-            group_year = self.youtube_data[self.youtube_data['created_year'] == y]
-            category_counts = group_year['category'].value_counts()
-            max_category = category_counts.idxmax()
-            max_category_value = category_counts.values.max()
-            m = {'Year': y, 'Category': max_category, 'total_created': max_category_value}
-            result.append(m)
-        year_trend = pd.DataFrame(result)
-        year_trend['Year'] = year_trend['Year'].astype(int)
-
-        def remove_outliers(df):
-            q1 = df.quantile(0.25)
-            q3 = df.quantile(0.75)
-            iqr = q3 - q1
-            lower_bound = q1 - 1.5 * iqr
-            upper_bound = q3 + 1.5 * iqr
-            return df[(df >= lower_bound) & (df <= upper_bound)]
-
-        df_no_outliers = self.youtube_data.groupby('category')['average_monthly_earnings'].apply(remove_outliers).reset_index()
-        fig, axs = plt.subplots(2, 2, figsize=(10, 6))
-        plt.subplots_adjust(hspace=0.4)
+        year_trend = self.cube.year_trend
+        fig = Figure(figsize=(10, 6))
+        axs = fig.subplots(2, 2)
+        fig.subplots_adjust(hspace=0.4)
         palette = sns.color_palette("Reds")
-        sns.regplot(data=self.youtube_data, x='average_monthly_earnings', y='subscribers',
-                    ax=axs[0, 0], scatter_kws={'color': palette[5]},
-                    line_kws={'color': palette[1]})
+        self.regression_plot('average_monthly_earnings', 'subscribers', axs[0, 0],
+                             palette[5], palette[1])
         axs[0, 0].set_ylim(0)
         axs[0, 0].set_yticks(axs[0, 0].get_yticks())
         axs[0, 0].set_yticklabels([f'{label / 1e6}' for label in axs[0, 0].get_yticks()])
@@ -108,13 +523,11 @@ class StoryTelling:
         axs[0, 1].set_title('The most created category for each year',
                             fontweight='bold', color=palette[5])
 
-        sns.boxplot(x='average_monthly_earnings', y='category', data=df_no_outliers,
-                    hue='category', palette='Reds', ax=axs[1, 0])
+        self.box_plot('average_monthly_earnings', axs[1, 0])
         axs[1, 0].set_title('Average earning for each category',
                             fontweight='bold', color=palette[5])
 
-        sns.histplot(df_no_outliers['average_monthly_earnings'], ax=axs[1, 1],
-                     color='red', kde=True)
+        self.histogram_plot('average_monthly_earnings', axs[1, 1], without_outliers=True)
         axs[1, 1].set_title('Histogram of Average of earning',
                             fontweight='bold', color=palette[5])
         self.controller.show_graph(fig)
@@ -127,18 +540,17 @@ class StoryTelling:
             - 'average_monthly_earning' and 'uploads'
         :return: None
         """
-        fig, axs = plt.subplots(1, 3, figsize=(10, 5))
+        fig = Figure(figsize=(10, 5))
+        axs = fig.subplots(1, 3)
         palette = sns.color_palette("Reds")
-        plt.suptitle('Correlation between average earning & '
+        fig.suptitle('Correlation between average earning & '
                      '(subscribers, video views, uploaded videos)',
                      fontsize=16, fontweight='bold', color=palette[5])
         sns.set_style('darkgrid')
 
         # First pair
-        ax = sns.regplot(data=self.youtube_data, x='average_monthly_earnings',
-                         y='subscribers', ax=axs[0],
-                         scatter_kws={'color': palette[5]},
-                         line_kws={'color': palette[1]})
+        ax = self.regression_plot('average_monthly_earnings', 'subscribers', axs[0],
+                                  palette[5], palette[1])
         ax.set_ylim(0)
         ax.set_yticks(ax.get_yticks())
         ax.set_yticklabels([f'{label / 1e6}' for label in ax.get_yticks()])
@@ -150,8 +562,8 @@ class StoryTelling:
         ax.set_xlabel('average_monthly_earning (million)')
 
         # Second pair
-        sns.regplot(data=self.youtube_data, x='average_monthly_earnings', y='video views', ax=axs[1],
-                    scatter_kws={'color': palette[2]}, line_kws={'color': palette[4]})
+        self.regression_plot('average_monthly_earnings', 'video views', axs[1],
+                             palette[2], palette[4])
         axs[1].set_ylim(0)
         axs[1].set_yticks(axs[1].get_yticks())
         axs[1].set_yticklabels([f'{label / 1e6}' for label in axs[1].get_yticks()])
@@ -163,8 +575,8 @@ class StoryTelling:
         axs[1].set_xlabel('average_monthly_earning (million)')
 
         # Third pair
-        sns.regplot(data=self.youtube_data, x='average_monthly_earnings', y='uploads', ax=axs[2],
-                    scatter_kws={'color': palette[3]}, line_kws={'color': palette[5]})
+        self.regression_plot('average_monthly_earnings', 'uploads', axs[2],
+                             palette[3], palette[5])
         axs[2].set_ylim(0)
         axs[2].set_yticks(axs[2].get_yticks())
         axs[2].set_yticklabels([f'{label / 1e6}' for label in axs[2].get_yticks()])
@@ -183,28 +595,17 @@ class StoryTelling:
         category for each year
         :return: None
         """
-        year = self.youtube_data['created_year'].unique()
-        year = sorted(year)
-
-        result = []
-        for i, y in enumerate(year):
-            group_year = self.youtube_data[self.youtube_data['created_year'] == y]
-            category_counts = group_year['category'].value_counts()
-            max_category = category_counts.idxmax()
-            max_category_value = category_counts.values.max()
-            m = {'Year': y, 'Category': max_category, 'total_created': max_category_value}
-            result.append(m)
-        year_trend = pd.DataFrame(result)
-        year_trend['Year'] = year_trend['Year'].astype(int)
+        year_trend = self.cube.year_trend
 
         # bar graph
         palette = sns.color_palette("Reds")
-        fig, ax = plt.subplots(figsize=(10, 5))
+        fig = Figure(figsize=(10, 5))
+        ax = fig.subplots()
         ax.set_title('The most created category for each year', fontsize=16,
                      fontweight='bold', color=palette[5])
         sns.set_style('darkgrid')
         sns.barplot(x='Year', y='total_created', hue='Category',
-                    data=year_trend, palette='Reds')
+                    data=year_trend, palette='Reds', ax=ax)
         self.controller.show_graph(fig)
 
     def third_story(self, event):
@@ -213,23 +614,13 @@ class StoryTelling:
         and a histogram of earnings.
         :return: None
         """
-        def remove_outliers(df):
-            q1 = df.quantile(0.25)
-            q3 = df.quantile(0.75)
-            iqr = q3 - q1
-            lower_bound = q1 - 1.5 * iqr
-            upper_bound = q3 + 1.5 * iqr
-            return df[(df >= lower_bound) & (df <= upper_bound)]
-
-        # remove outliers for each channel type
         palette = sns.color_palette("Reds")
-        df_no_outliers = self.youtube_data.groupby('category')['average_monthly_earnings'].apply(remove_outliers).reset_index()
-        fig, axs = plt.subplots(1, 2, figsize=(10, 5))
+        fig = Figure(figsize=(10, 5))
+        axs = fig.subplots(1, 2)
         sns.set_style('darkgrid')
 
         # First subplot (boxplot)
-        ax = sns.boxplot(x='average_monthly_earnings', y='category', data=df_no_outliers,
-                         hue='category', palette='Reds', ax=axs[0])
+        ax = self.box_plot('average_monthly_earnings', axs[0])
         ax.set_xlim(left=0)
         ax.set_xticks(ax.get_xticks())
         ax.set_xticklabels([f'{int(label / 1e6)}' for label in ax.get_xticks()])
@@ -238,28 +629,33 @@ class StoryTelling:
                      fontweight='bold', color=palette[5])
 
         # Second subplot (histogram)
-        sns.histplot(df_no_outliers['average_monthly_earnings'], ax=axs[1],
-                     color='red', kde=True)
+        self.histogram_plot('average_monthly_earnings', axs[1], without_outliers=True)
         axs[1].set_xlabel('average_monthly_earnings')
         axs[1].set_ylabel('Frequency')
         axs[1].set_title('Histogram of Average of earning', fontsize=16,
                          fontweight='bold', color=palette[5])
 
-        plt.tight_layout()
+        fig.tight_layout()
         self.controller.show_graph(fig)
 
-    def create_histogram(self, attribute):
+    def create_histogram(self, attribute, bins=None, scale=None):
         """
         Create a histogram of the specified attribute.
         :param attribute: Selected attribute from user
+        :param bins: Selected number of bins, or None to choose it from the data
+        :param scale: 'linear' or 'log' scale of the x axis, or None for linear
         :return: None
         """
-        fig, ax = plt.subplots(figsize=(5, 4))
-        to_create = self.youtube_data[attribute]
+        bins = int(bins) if bins is not None else None
+        scale = scale or 'linear'
+        fig = Figure(figsize=(5, 4))
+        ax = fig.subplots()
         palette = sns.color_palette("Reds")
         ax.set_title(f'Histogram of {attribute}', fontsize=16, fontweight='bold', color=palette[5])
-        sns.histplot(to_create, color='red', kde=True)
-        if max(ax.get_xticks()) > 1e6:
+        self.histogram_plot(attribute, ax, bins=bins, scale=scale)
+        if scale == 'log':
+            ax.set_xlabel(f'{attribute} (log scale)')
+        elif max(ax.get_xticks()) > 1e6:
             if max(ax.get_xticks()) > 1e7:
                 ax.set_xlim(left=0)
                 ax.set_xticks(ax.get_xticks())
@@ -285,13 +681,13 @@ class StoryTelling:
         """
         if attribute_1 is not None and attribute_2 is not None:
             palette = sns.color_palette("Reds")
-            fig, ax = plt.subplots(figsize=(6, 4))
+            fig = Figure(figsize=(6, 4))
+            ax = fig.subplots()
             ax.set_title(f'Correlation between {attribute_1} and {attribute_2}',
                          fontsize=16, fontweight='bold',
                          color=palette[5])
             sns.set_style('darkgrid')
-            sns.regplot(data=self.youtube_data, x=attribute_1, y=attribute_2,
-                        scatter_kws={'color': palette[5]}, line_kws={'color': palette[1]})
+            self.regression_plot(attribute_1, attribute_2, ax, palette[5], palette[1])
 
             if max(ax.get_yticks()) > 1e6:
                 ax.set_ylim(0)
@@ -320,10 +716,10 @@ class StoryTelling:
         :param year: Selected year from user
         :return: None
         """
-        df_year = self.youtube_data[self.youtube_data['created_year'] == int(year)]
-        category_year = df_year['category'].value_counts().sort_values(ascending=True)
+        category_year = self.cube.category_counts(int(year))
 
-        fig, ax = plt.subplots(figsize=(5, 4))
+        fig = Figure(figsize=(5, 4))
+        ax = fig.subplots()
         palette = sns.color_palette("Reds")
         ax.set_title(f'Category created in the year {year}',
                      fontsize=16, fontweight='bold',
@@ -331,9 +727,9 @@ class StoryTelling:
         color = ['#c61a09', '#df2c14', '#ed3419', '#f01e2c',
                  '#ff6242', '#ff8164', '#ffa590', '#ffc9bb',
                  '#c30010', '#f94449', '#ee6b6e']
-        plt.pie(category_year.values, labels=category_year.index,
-                autopct='%1.1f%%', startangle=140, colors=color)
-        plt.axis('equal')
+        ax.pie(category_year.values, labels=category_year.index,
+               autopct='%1.1f%%', startangle=140, colors=color)
+        ax.axis('equal')
         return self.controller.show_create_graph(fig)
 
     def create_bar(self, attribute):
@@ -342,17 +738,17 @@ class StoryTelling:
         :param attribute: Selected attribute from user
         :return: None
         """
-        average_per_category = self.youtube_data.groupby('category')[attribute].mean()
-        average_per_category_df = pd.DataFrame(average_per_category)
+        average_per_category_df = self.cube.category_means[[attribute]]
 
         palette = sns.color_palette("Reds")
-        fig, ax = plt.subplots(figsize=(6, 4))
+        fig = Figure(figsize=(6, 4))
+        ax = fig.subplots()
         ax.set_title(f'Average of {attribute} for each category',
                      fontsize=16, fontweight='bold',
                      color=palette[5])
         sns.set_style('darkgrid')
         sns.barplot(x=attribute, y='category', data=average_per_category_df,
-                    hue='category', palette='Reds')
+                    hue='category', palette='Reds', ax=ax)
         if max(ax.get_xticks()) > 1e6:
             if max(ax.get_xticks()) > 1e7:
                 ax.set_xlim(left=0)
@@ -376,9 +772,9 @@ class StoryTelling:
         :param category: Selected category from user
         :return: None
         """
-        df = self.youtube_data[self.youtube_data['category'] == category]
-        top_10_sub = df.sort_values(by='subscribers', ascending=False).head(10)
-        fig, ax = plt.subplots(figsize=(6, 5))
+        top_10_sub = self.top_channels(category, 'subscribers')
+        fig = Figure(figsize=(6, 5))
+        ax = fig.subplots()
         sns.set_style('darkgrid')
         ax.tick_params(axis='y', rotation=30)
         palette = sns.color_palette("Reds")
@@ -410,9 +806,9 @@ class StoryTelling:
         :param category: Selected category from user
         :return: None
         """
-        df = self.youtube_data[self.youtube_data['category'] == category]
-        top_10_view = df.sort_values(by='video views', ascending=False).head(10)
-        fig, ax = plt.subplots(figsize=(6, 5))
+        top_10_view = self.top_channels(category, 'video views')
+        fig = Figure(figsize=(6, 5))
+        ax = fig.subplots()
         sns.set_style('darkgrid')
         ax.tick_params(axis='y', rotation=30)
         palette = sns.color_palette("Reds")
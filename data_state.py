@@ -0,0 +1,234 @@
+import threading
+from data_cube import AggregateCube, CUBE_COLUMNS
+from regression import LineFit
+from row_index import RowIndex, intersect_rows
+from running_stats import RunningStats
+from topk_index import TopKIndex
+
+
+class DataState:
+    """
+        The rows and the filter graphs are created from, with the aggregates
+        built from them on first use. A state is not changed to show other data
+        or another filter, a new state replaces it, so an aggregate is always
+        kept in the state it is built from, whichever thread builds it.
+        Aggregates are built while holding the lock of the state, so two
+        threads never build the same one.
+
+        Attributes:
+            youtube_data: DataFrame of every row.
+            version: data_version of youtube_data.
+            partial: Aggregates of the whole file in streaming mode, otherwise None.
+            data_filter: CrossFilter of the channels graphs show, or None for every channel.
+            key: Key of data_filter, or None.
+            top_k: Number of top channels kept for each category.
+            indexes: Dict of column to RowIndex of youtube_data, shared by the
+                     states of every filter of the same data.
+            fits: Dict of (x column, y column) to LineFit of filtered_data, or of the
+                  whole file in streaming mode without a filter.
+            densities: Dict of (column, bandwidth, filter, scale) to (grid, density) of
+                       binned_kde, with grid in log10 on the log scale.
+            pyramids: Dict of (column, scale, filter) to HistogramPyramid of filtered_data.
+            lock: RLock held while an aggregate is built.
+    """
+
+    def __init__(self, youtube_data, version, partial=None, data_filter=None, top_k=10,
+                 indexes=None):
+        """
+        Initialize a DataState object without building any aggregate.
+        :param youtube_data: DataFrame of every row.
+        :param version: data_version of youtube_data.
+        :param partial: PartialAggregate of the whole file in streaming mode, or None.
+        :param data_filter: CrossFilter, or None to show every channel.
+        :param top_k: Number of top channels kept for each category.
+        :param indexes: Dict of row indexes of youtube_data to share, or None.
+        """
+        if data_filter is not None and data_filter.is_empty():
+            data_filter = None
+        self.youtube_data = youtube_data
+        self.version = version
+        self.partial = partial
+        self.data_filter = data_filter
+        self.key = data_filter.key() if data_filter is not None else None
+        self.top_k = top_k
+        self.indexes = indexes if indexes is not None else {}
+        self.fits = {}
+        self.densities = {}
+        self.pyramids = {}
+        self.lock = threading.RLock()
+        self._filtered_data = None
+        self._cube = None
+        self._top_index = None
+        self._stats = None
+
+    def with_filter(self, data_filter):
+        """
+        Create the state of the same data with another filter.
+        :param data_filter: CrossFilter, or None to show every channel.
+        :return: DataState object sharing the row indexes of this one.
+        """
+        return DataState(self.youtube_data, self.version, self.partial, data_filter,
+                         self.top_k, self.indexes)
+
+    def drop_rows(self, indexes):
+        """
+        Drop the filtered rows and the row indexes, which are kept in memory
+        unlike a memory-mapped youtube_data, so a state kept for later holds
+        only its aggregates. They are built again on next use.
+        :param indexes: Dict to share the row indexes built again with the other
+                        states of the same data.
+        :return: None
+        """
+        with self.lock:
+            self._filtered_data = None
+            self.indexes = indexes
+
+    @property
+    def view_version(self):
+        """
+        Version of the data and the filter, for caching graphs.
+        """
+        return self.version, self.key
+
+    def cached(self, cache, key, build):
+        """
+        Get an aggregate kept in a dict of the state, built on first use.
+        :param cache: The dict, for example fits or indexes.
+        :param key: Key of the aggregate in the dict.
+        :param build: Function that builds the aggregate.
+        :return: The aggregate.
+        """
+        with self.lock:
+            if key not in cache:
+                cache[key] = build()
+            return cache[key]
+
+    @property
+    def filtered_data(self):
+        """
+        Rows of youtube_data the filter keeps, gathered through the row indexes
+        once for each filter instead of comparing columns for every graph.
+        """
+        if self.data_filter is None:
+            return self.youtube_data
+        with self.lock:
+            if self._filtered_data is None:
+                data_filter = self.data_filter
+                self._filtered_data = self.take_rows(self.filter_rows(
+                    data_filter.categories, data_filter.years, data_filter.subscribers))
+            return self._filtered_data
+
+    @property
+    def cube(self):
+        """
+        Aggregates of filtered_data, or of the whole file in streaming mode without a filter.
+        """
+        with self.lock:
+            if self._cube is None:
+                if self.partial is not None and self.data_filter is None:
+                    self._cube = AggregateCube.from_partial(self.partial)
+                else:
+                    self._cube = AggregateCube(self.filtered_data)
+            return self._cube
+
+    @property
+    def top_index(self):
+        """
+        TopKIndex of the channels of filtered_data with the largest values for each
+        category, or of the whole file in streaming mode without a filter.
+        """
+        with self.lock:
+            if self._top_index is None:
+                if self.partial is not None and self.data_filter is None:
+                    self._top_index = self.partial.top
+                else:
+                    top_index = TopKIndex(self.top_k)
+                    top_index.update(self.filtered_data)
+                    self._top_index = top_index
+            return self._top_index
+
+    @top_index.setter
+    def top_index(self, top_index):
+        # for an index updated with new rows instead of being built again
+        self._top_index = top_index
+
+    @property
+    def stats(self):
+        """
+        RunningStats of the numeric columns of filtered_data for each category,
+        or of the whole file in streaming mode without a filter.
+        """
+        with self.lock:
+            if self._stats is None:
+                if self.partial is not None and self.data_filter is None:
+                    self._stats = self.partial.stats
+                else:
+                    stats = RunningStats()
+                    stats.update(self.filtered_data)
+                    self._stats = stats
+            return self._stats
+
+    @stats.setter
+    def stats(self, stats):
+        # for statistics updated with new rows instead of being built again
+        self._stats = stats
+
+    def line_fit(self, x, y):
+        """
+        Fit a least squares line of filtered_data, or of the whole file in
+        streaming mode without a filter.
+        :param x: Column name of x axis.
+        :param y: Column name of y axis.
+        :return: LineFit object.
+        """
+        def fit():
+            if self.partial is not None and self.data_filter is None:
+                return LineFit.from_moments(self.partial.moments, CUBE_COLUMNS.index(x) + 1,
+                                            CUBE_COLUMNS.index(y) + 1)
+            data = self.filtered_data
+            return LineFit.from_data(data[x], data[y])
+
+        return self.cached(self.fits, (x, y), fit)
+
+    def row_index(self, column):
+        """
+        Get the RowIndex of a column of youtube_data.
+        :param column: Name of the column, for example 'category' or 'created_year'.
+        :return: RowIndex object.
+        """
+        return self.cached(self.indexes, column, lambda: RowIndex(self.youtube_data, column))
+
+    def filter_rows(self, categories=None, years=None, subscribers=None):
+        """
+        Find the rows of youtube_data in any of the categories, in the years and
+        in the subscribers range, through the row indexes instead of comparing
+        whole columns.
+        :param categories: Iterable of categories, or None for every category.
+        :param years: (first, last) years, both included, or None for every year.
+                      Either year can be None for no bound.
+        :param subscribers: (low, high) numbers of subscribers, both included, or
+                            None for any number. Either number can be None for no bound.
+        :return: Sorted array of row positions, or None if nothing is filtered.
+        """
+        rows = []
+        if categories is not None:
+            rows.append(self.row_index('category').any_of(categories))
+        if years is not None:
+            rows.append(self.row_index('created_year').between(*years))
+        if subscribers is not None:
+            rows.append(self.row_index('subscribers').between(*subscribers))
+        if not rows:
+            return None
+        return intersect_rows(*rows)
+
+    def take_rows(self, rows, columns=None):
+        """
+        Gather rows of youtube_data by position.
+        :param rows: Array of row positions, or None for every row.
+        :param columns: Names of the columns to gather, or None for every column.
+        :return: DataFrame of the rows.
+        """
+        data = self.youtube_data if columns is None else self.youtube_data[columns]
+        if rows is None:
+            return data
+        return data.take(rows)
@@ -0,0 +1,162 @@
+import os
+import pandas as pd
+from data_loader import read_csv, kept_rows
+
+
+def row_keys(raw):
+    """
+    Key rows by channel name and the number of earlier rows with the same name,
+    so channels with the same name are still different rows.
+    :param raw: DataFrame of raw YouTube data.
+    :return: MultiIndex of (Youtuber, occurrence) of each row.
+    """
+    occurrence = raw.groupby('Youtuber', sort=False).cumcount()
+    return pd.MultiIndex.from_arrays([raw['Youtuber'].to_numpy(), occurrence.to_numpy()],
+                                     names=['Youtuber', 'occurrence'])
+
+
+def file_signature(path):
+    """
+    Get what is compared to find out that a file is changed.
+    :param path: Path of the file.
+    :return: (modification time in nanoseconds, size), or None if the file is missing.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class FileSnapshot:
+    """
+        Hash of every raw row of the file at one time, used to find which rows change.
+
+        Attributes:
+            signature: file_signature of the file when it was read.
+            hashes: Series of row hash indexed by row key.
+            data_keys: Keys of the rows of youtube_data, in the same order.
+    """
+
+    def __init__(self, signature, raw):
+        """
+        Hash rows of the file.
+        :param signature: file_signature of the file when it was read.
+        :param raw: DataFrame of raw YouTube data read from the file.
+        """
+        keys = row_keys(raw)
+        self.signature = signature
+        self.hashes = pd.Series(pd.util.hash_pandas_object(raw, index=False).to_numpy(),
+                                index=keys)
+        self.data_keys = keys[kept_rows(raw).to_numpy()]
+
+
+class RowDelta:
+    """
+        Rows of a file that changed since the last snapshot.
+
+        Attributes:
+            snapshot: FileSnapshot of the changed file.
+            removed: Keys of rows that are removed or modified.
+            rows: DataFrame of raw rows that are added or modified.
+            keys: Keys of the rows.
+            added: Number of added rows.
+            deleted: Number of removed rows.
+            modified: Number of modified rows.
+    """
+
+    def __init__(self, snapshot, removed, rows, keys, added, deleted, modified):
+        """
+        Initialize a RowDelta object.
+        :param snapshot: FileSnapshot of the changed file.
+        :param removed: Keys of rows that are removed or modified.
+        :param rows: DataFrame of raw rows that are added or modified.
+        :param keys: Keys of the rows.
+        :param added: Number of added rows.
+        :param deleted: Number of removed rows.
+        :param modified: Number of modified rows.
+        """
+        self.snapshot = snapshot
+        self.removed = removed
+        self.rows = rows
+        self.keys = keys
+        self.added = added
+        self.deleted = deleted
+        self.modified = modified
+
+    def is_empty(self):
+        """
+        Check whether no row changed.
+        :return: True if nothing is added, removed or modified.
+        """
+        return self.added == 0 and self.deleted == 0 and self.modified == 0
+
+
+class DatasetWatcher:
+    """
+        Watch the csv file and find rows that are added, removed or modified,
+        keyed on the channel name. Reading the file and finding the delta can run
+        in a background thread; applying it must run where youtube_data is used.
+
+        Attributes:
+            path: Path of the csv file.
+            snapshot: FileSnapshot that youtube_data currently matches, or None
+                      before the first snapshot is taken.
+    """
+
+    def __init__(self, path):
+        """
+        Initialize a DatasetWatcher object.
+        :param path: Path of the csv file.
+        """
+        self.path = path
+        self.snapshot = None
+
+    def take_snapshot(self):
+        """
+        Read the file and hash its rows.
+        :return: FileSnapshot of the file.
+        """
+        signature = file_signature(self.path)
+        return FileSnapshot(signature, read_csv(self.path))
+
+    def changed(self):
+        """
+        Check whether the file is changed since the current snapshot.
+        :return: True if the file is changed.
+        """
+        return (self.snapshot is not None and
+                file_signature(self.path) not in (None, self.snapshot.signature))
+
+    def compute_delta(self):
+        """
+        Read the file and compare its rows with the current snapshot.
+        :return: RowDelta of the changes.
+        """
+        signature = file_signature(self.path)
+        raw = read_csv(self.path)
+        snapshot = FileSnapshot(signature, raw)
+        old = self.snapshot.hashes
+        new = snapshot.hashes
+        common = old.index.intersection(new.index)
+        deleted = old.index.difference(new.index)
+        added = new.index.difference(old.index)
+        modified = common[old[common].to_numpy() != new[common].to_numpy()]
+        changed = new.index.isin(added.append(modified))
+        rows = raw[changed].reset_index(drop=True)
+        return RowDelta(snapshot, deleted.append(modified), rows, new.index[changed],
+                        len(added), len(deleted), len(modified))
+
+    def apply(self, delta, story):
+        """
+        Apply a delta to the data and make its snapshot the current one.
+        :param delta: RowDelta from compute_delta.
+        :param story: The StoryTelling object whose data matches the current snapshot.
+        :return: None
+        """
+        drop = self.snapshot.data_keys.isin(delta.removed)
+        # kept rows stay in place and changed rows are appended, like youtube_data
+        added_keys = delta.keys[kept_rows(delta.rows).to_numpy()]
+        delta.snapshot.data_keys = self.snapshot.data_keys[~drop].append(added_keys)
+        story.apply_delta(drop, delta.rows)
+        self.snapshot = delta.snapshot
@@ -0,0 +1,64 @@
+import tkinter as tk
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+
+class GraphDisplay:
+    """
+        A long-lived figure and canvas that displays rendered graphs on a Tk canvas.
+        A new graph only replaces the pixels of one image artist and is blitted,
+        so no widget or figure is created per graph.
+
+        Attributes:
+            figure: The figure of the display.
+            canvas: The FigureCanvasTkAgg packed in the Tk canvas.
+            image: The image artist holding pixels of the current graph.
+            background: Saved pixels of the empty figure used for blitting.
+    """
+
+    def __init__(self, master):
+        """
+        Initialize a GraphDisplay object.
+        :param master: The Tk canvas that will display graph.
+        """
+        self.figure = Figure(facecolor='#f8f6f2')
+        self.canvas = FigureCanvasTkAgg(self.figure, master=master)
+        self.image = self.figure.figimage(np.zeros((1, 1, 4), dtype=np.uint8),
+                                          origin='upper', animated=True)
+        self.background = None
+        self.canvas.mpl_connect('draw_event', self.on_draw)
+        self.canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=1)
+
+    def size(self):
+        """
+        Get size of the figure in pixels.
+        :return: (width, height) of the figure.
+        """
+        return int(self.figure.bbox.width), int(self.figure.bbox.height)
+
+    def on_draw(self, event):
+        """
+        Save the empty background and draw the graph after the figure is fully redrawn,
+        for example after the window is resized.
+        :param event: The matplotlib draw event.
+        :return: None
+        """
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self.figure.draw_artist(self.image)
+
+    def show(self, rgba):
+        """
+        Display a rendered graph, blitting only the image when possible.
+        :param rgba: RGBA array of the graph.
+        :return: None
+        """
+        self.image.set_data(rgba)
+        # anchor the graph to the top left corner of the figure
+        self.image.oy = max(0, self.size()[1] - rgba.shape[0])
+        if self.background is None:
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self.background)
+        self.figure.draw_artist(self.image)
+        self.canvas.blit(self.figure.bbox)
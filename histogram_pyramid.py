@@ -0,0 +1,188 @@
+import math
+import matplotlib as mpl
+import numpy as np
+from matplotlib.colors import to_rgba
+
+# bins of the finest level, a power of two so each coarser level halves the one below
+BASE_BINS = 1 << 12
+SCALES = ['linear', 'log']
+
+
+class HistogramPyramid:
+    """
+        Counts of the values of a column in BASE_BINS equal bins between the
+        smallest and largest value, with coarser levels that each merge pairs of
+        bins of the level below. A histogram with any number of bins over any
+        range is summed from the fewest blocks of the levels, in
+        O(bins log BASE_BINS), without reading the values again. On the log scale
+        the bins have equal width in log10 of the values.
+
+        Attributes:
+            scale: 'linear' or 'log'.
+            low: Smallest value, in log10 on the log scale.
+            high: Largest value, in log10 on the log scale.
+            count: Number of values in the bins.
+            excluded: Number of values left out, zero or negative ones on the log scale.
+            levels: List of arrays of counts, levels[0] has the finest bins and
+                    levels[i] merges pairs of bins of levels[i - 1].
+    """
+
+    def __init__(self, values, scale='linear', base_bins=BASE_BINS):
+        """
+        Count the values in the finest bins and merge them into the coarser levels.
+        :param values: Array of values, missing values are ignored.
+        :param scale: 'linear' or 'log'.
+        :param base_bins: Number of finest bins, a power of two.
+        """
+        if scale not in SCALES:
+            raise ValueError(f'scale must be one of {", ".join(SCALES)}')
+        if base_bins < 1 or base_bins & (base_bins - 1):
+            raise ValueError('base_bins must be a power of two')
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        self.scale = scale
+        self.excluded = 0
+        if scale == 'log':
+            positive = values > 0
+            self.excluded = int(values.size - np.count_nonzero(positive))
+            values = np.log10(values[positive])
+        self.count = values.size
+        self.low, self.high = (values.min(), values.max()) if values.size else (0.0, 1.0)
+        if self.high <= self.low:
+            # a single value gets a range of width 1 around it, like numpy
+            self.low -= 0.5
+            self.high += 0.5
+        position = (values - self.low) * (base_bins / (self.high - self.low))
+        counts = np.bincount(np.clip(position.astype(np.int64), 0, base_bins - 1),
+                             minlength=base_bins)
+        self.levels = [counts]
+        while counts.size > 1:
+            counts = counts[0::2] + counts[1::2]
+            self.levels.append(counts)
+
+    def transform(self, values):
+        """
+        Convert values to the scale of the bins.
+        :param values: Value or array of values.
+        :return: The values, or their log10 on the log scale.
+        """
+        return np.log10(values) if self.scale == 'log' else values
+
+    def inverse(self, values):
+        """
+        Convert values on the scale of the bins back to values.
+        :param values: Value or array on the scale of the bins.
+        :return: The values, or 10 to their power on the log scale.
+        """
+        return np.power(10.0, values) if self.scale == 'log' else values
+
+    def base_width(self):
+        """
+        Get the width of the finest bins.
+        :return: Width on the scale of the bins.
+        """
+        return (self.high - self.low) / self.levels[0].size
+
+    def range_counts(self, starts, stops):
+        """
+        Count the values in many ranges of finest bins at once. Going up the
+        levels, a range takes the bin at an odd end and drops to the level
+        above, so each range is the sum of at most two bins of each level.
+        :param starts: Array of first finest bin of each range.
+        :param stops: Array of finest bin after the last of each range.
+        :return: Array of number of values in each range.
+        """
+        starts = np.array(starts, dtype=np.int64)
+        stops = np.array(stops, dtype=np.int64)
+        total = np.zeros(starts.size, dtype=np.int64)
+        for counts in self.levels:
+            take = (starts & 1).astype(bool) & (starts < stops)
+            total[take] += counts[starts[take]]
+            starts[take] += 1
+            take = (stops & 1).astype(bool) & (starts < stops)
+            stops[take] -= 1
+            total[take] += counts[stops[take]]
+            starts >>= 1
+            stops >>= 1
+        return total
+
+    def bin_range(self, low=None, high=None):
+        """
+        Find the finest bins a range of values covers.
+        :param low: Smallest value of the range, or None for the smallest value.
+        :param high: Largest value of the range, or None for the largest value.
+        :return: (first, stop) indexes of the finest bins, stop is excluded.
+        """
+        size = self.levels[0].size
+        width = self.base_width()
+        first = 0
+        stop = size
+        if self.scale == 'log' and low is not None and low <= 0:
+            low = None
+        if low is not None:
+            first = min(max(math.floor((self.transform(low) - self.low) / width), 0), size)
+        if high is not None:
+            stop = min(max(math.ceil((self.transform(high) - self.low) / width), 0), size)
+        return first, max(first, stop)
+
+    def auto_bins(self, first, stop):
+        """
+        Choose a number of bins like numpy's 'auto' rule, the smaller width of the
+        Freedman-Diaconis and Sturges rules, with the quartiles found from the counts
+        and the Freedman-Diaconis width kept above half the square root rule width.
+        :param first: First finest bin of the range.
+        :param stop: Finest bin after the last of the range.
+        :return: Number of bins.
+        """
+        counts = self.levels[0][first:stop]
+        n = counts.sum()
+        if n < 2:
+            return 1
+        cumulative = np.concatenate(([0], np.cumsum(counts)))
+        edges = self.low + self.base_width() * np.arange(first, stop + 1)
+        q1, q3 = np.interp([0.25 * n, 0.75 * n], cumulative, edges)
+        span = edges[-1] - edges[0]
+        width = span / (math.log2(n) + 1)
+        if q3 > q1:
+            width = min(width, max(2 * (q3 - q1) / n ** (1 / 3), span / math.sqrt(n) / 2))
+        return max(1, math.ceil(span / width))
+
+    def histogram(self, bins=None, low=None, high=None):
+        """
+        Create a histogram from the levels. Edges are on the finest bins, so a
+        range is widened to them, and each bin merges the same number of finest
+        bins, so there can be fewer bins than asked, and never more than the
+        finest bins of the range.
+        :param bins: Number of bins, or None to choose it like numpy's 'auto' rule.
+        :param low: Smallest value to show, or None for the smallest value.
+        :param high: Largest value to show, or None for the largest value.
+        :return: (edges, counts) arrays, edges are values, not on the scale of the bins.
+        """
+        if bins is not None and bins < 1:
+            raise ValueError('bins must be at least 1')
+        first, stop = self.bin_range(low, high)
+        if stop == first:
+            return self.inverse(np.array([self.low, self.high])), np.zeros(1, dtype=np.int64)
+        if bins is None:
+            bins = self.auto_bins(first, stop)
+        step = math.ceil((stop - first) / bins)
+        starts = first + step * np.arange(math.ceil((stop - first) / step) + 1)
+        counts = self.range_counts(starts[:-1], np.minimum(starts[1:], self.levels[0].size))
+        return self.inverse(self.low + self.base_width() * starts), counts
+
+
+def draw_histogram(ax, edges, counts, color):
+    """
+    Draw histogram bars, like seaborn.histplot.
+    :param ax: The matplotlib axes to draw on.
+    :param edges: Array of bin edges.
+    :param counts: Array of number of values in each bin.
+    :param color: Color of the bars.
+    :return: None
+    """
+    bars = ax.bar(edges[:-1], counts, np.diff(edges), align='edge', color='none',
+                  facecolor=to_rgba(color, .75), edgecolor=mpl.rcParams['patch.edgecolor'])
+    for bar in bars:
+        bar.sticky_edges.x[:] = (edges[0], edges[-1])
+        bar.sticky_edges.y[:] = (0, np.inf)
+    ax.set_ylabel('Count')
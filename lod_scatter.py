@@ -0,0 +1,69 @@
+import numpy as np
+from matplotlib.colors import LogNorm
+from regression import LineFit, draw_fit
+
+# scatter plots with more points than this are drawn as a density
+LOD_THRESHOLD = 20000
+
+
+def sparse_sample(bin_ids, counts, sparse_count, per_bin, rng):
+    """
+    Pick a stratified sample of points that lie in sparse bins.
+    :param bin_ids: Bin of each point.
+    :param counts: Number of points in the bin of each point.
+    :param sparse_count: Bins with at most this number of points are sparse.
+    :param per_bin: Maximum number of points picked from each sparse bin.
+    :param rng: NumPy random generator.
+    :return: Indexes of the picked points.
+    """
+    candidates = np.flatnonzero(counts <= sparse_count)
+    if candidates.size == 0:
+        return candidates
+    # shuffle inside each bin, then keep the first points of every bin
+    order = np.lexsort((rng.random(candidates.size), bin_ids[candidates]))
+    candidates = candidates[order]
+    ids = bin_ids[candidates]
+    starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+    rank = np.arange(ids.size) - np.repeat(starts, np.diff(np.r_[starts, ids.size]))
+    return candidates[rank < per_bin]
+
+
+def draw_density_scatter(ax, x, y, color, line_color, fit=None, bins=150,
+                         sparse_count=3, per_bin=2, seed=0):
+    """
+    Draw a binned 2D density of the points with a sample of outlying points and a
+    regression line with its confidence band, instead of one marker for each point.
+    :param ax: The matplotlib axes to draw on.
+    :param x: Array of x values.
+    :param y: Array of y values.
+    :param color: Color of the outlying points.
+    :param line_color: Color of the regression line.
+    :param fit: LineFit of the regression line, or None to fit it from x and y.
+    :param bins: Number of bins along each axis.
+    :param sparse_count: Bins with at most this number of points show their points.
+    :param per_bin: Maximum number of points shown for each sparse bin.
+    :param seed: Seed of the sample of outlying points.
+    :return: None
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    valid = np.isfinite(x) & np.isfinite(y)
+    x = x[valid]
+    y = y[valid]
+    if x.size == 0:
+        return
+    density, x_edges, y_edges = np.histogram2d(x, y, bins=bins)
+    density = np.ma.masked_equal(density, 0)
+    ax.pcolormesh(x_edges, y_edges, density.T, cmap='Reds',
+                  norm=LogNorm(vmin=1, vmax=max(density.max(), 2)))
+
+    x_bin = np.clip(np.searchsorted(x_edges, x, side='right') - 1, 0, bins - 1)
+    y_bin = np.clip(np.searchsorted(y_edges, y, side='right') - 1, 0, bins - 1)
+    bin_ids = x_bin * bins + y_bin
+    counts = np.bincount(bin_ids, minlength=bins * bins)[bin_ids]
+    picked = sparse_sample(bin_ids, counts, sparse_count, per_bin, np.random.default_rng(seed))
+    ax.scatter(x[picked], y[picked], s=8, color=color)
+
+    if fit is None:
+        fit = LineFit.from_data(x, y)
+    draw_fit(ax, fit, x.min(), x.max(), line_color)
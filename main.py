@@ -1,5 +1,36 @@
+import time
+
+# taken before the other imports, so the startup time includes importing
+started = time.perf_counter()
+
+import argparse
 from youtube_controller import YouTubeController
 
 
-app = YouTubeController()
+parser = argparse.ArgumentParser(description='YouTube Trend Analysis')
+parser.add_argument('--streaming', action='store_true',
+                    help='read the dataset in chunks and keep only aggregates in memory')
+parser.add_argument('--perf-log', metavar='FILE',
+                    help='record timings of handlers and graphs and append them to FILE '
+                         'as JSON lines on exit')
+parser.add_argument('--lazy', action='store_true',
+                    help='show the home page first and load the data in the background')
+parser.add_argument('--watch', action='store_true',
+                    help='apply changes of the dataset file while the application runs')
+parser.add_argument('--compact', action='store_true',
+                    help='keep the data in smaller dtypes to use less memory')
+parser.add_argument('--store', metavar='DIR',
+                    help='open snapshots of a column store made by column_store.py '
+                         'instead of the csv file')
+parser.add_argument('--snapshot', metavar='NAME',
+                    help='snapshot of the store to open first (default: the latest)')
+args = parser.parse_args()
+if args.watch and args.streaming:
+    parser.error('--watch can not be used with --streaming')
+if args.store and (args.streaming or args.watch):
+    parser.error('--store can not be used with --streaming or --watch')
+
+app = YouTubeController(streaming=args.streaming, perf_log=args.perf_log, lazy=args.lazy,
+                        started=started, watch=args.watch, compact=args.compact,
+                        store=args.store, snapshot=args.snapshot)
 app.run()
@@ -0,0 +1,151 @@
+import functools
+import json
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+
+# shared by every measure() call while recording is off, so nothing is allocated
+_NO_TIMER = nullcontext()
+
+
+class _Timer:
+    """
+        Context manager that records the time spent inside it.
+
+        Attributes:
+            recorder: The LatencyRecorder to record to.
+            name: Name of the handler or graph.
+            phase: Name of the phase.
+    """
+
+    def __init__(self, recorder, name, phase):
+        """
+        Initialize a _Timer object.
+        :param recorder: The LatencyRecorder to record to.
+        :param name: Name of the handler or graph.
+        :param phase: Name of the phase.
+        """
+        self.recorder = recorder
+        self.name = name
+        self.phase = phase
+        self._start = None
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.recorder.record(self.name, self.phase, time.perf_counter() - self._start)
+
+
+class LatencyRecorder:
+    """
+        Ring buffer of timings of handlers and the phases of creating a graph,
+        for example 'handler', 'compute', 'rasterize' and 'display'.
+        Recording can be turned on and off while the application runs.
+
+        Attributes:
+            enabled: Timings are recorded only if True.
+            records: Deque of the latest (wall clock time, name, phase, seconds, thread name).
+    """
+
+    def __init__(self, enabled=False, capacity=10000):
+        """
+        Initialize a LatencyRecorder object.
+        :param enabled: Record timings if True.
+        :param capacity: Number of latest timings that are kept.
+        """
+        self.enabled = enabled
+        self.records = deque(maxlen=capacity)
+
+    def measure(self, name, phase):
+        """
+        Time the code inside a with statement.
+        :param name: Name of the handler or graph.
+        :param phase: Name of the phase.
+        :return: Context manager.
+        """
+        if not self.enabled:
+            return _NO_TIMER
+        return _Timer(self, name, phase)
+
+    def record(self, name, phase, seconds):
+        """
+        Record a timing. This can be called from any thread.
+        :param name: Name of the handler or graph.
+        :param phase: Name of the phase.
+        :param seconds: Time spent.
+        :return: None
+        """
+        if self.enabled:
+            self.records.append((time.time(), name, phase, seconds,
+                                 threading.current_thread().name))
+
+    def summary(self):
+        """
+        Summarize the recorded timings of each name and phase.
+        :return: List of (name, phase, count, p50 ms, p95 ms), slowest p95 first.
+        """
+        groups = {}
+        for _, name, phase, seconds, _ in list(self.records):
+            groups.setdefault((name, phase), []).append(seconds)
+        rows = []
+        for (name, phase), seconds in groups.items():
+            seconds.sort()
+            rows.append((name, phase, len(seconds), percentile(seconds, 50) * 1000,
+                         percentile(seconds, 95) * 1000))
+        return sorted(rows, key=lambda row: row[4], reverse=True)
+
+    def format_summary(self, limit=20):
+        """
+        Format the summary as a text table.
+        :param limit: Maximum number of rows.
+        :return: String of the table.
+        """
+        lines = [f'{"name":<26}{"phase":<11}{"n":>5}{"p50 ms":>9}{"p95 ms":>9}']
+        for name, phase, count, p50, p95 in self.summary()[:limit]:
+            lines.append(f'{name[:25]:<26}{phase:<11}{count:>5}{p50:>9.1f}{p95:>9.1f}')
+        if len(lines) == 1:
+            lines.append('no timings recorded yet')
+        return '\n'.join(lines)
+
+    def export_jsonl(self, path):
+        """
+        Append the recorded timings to a JSON lines file, one timing for each line.
+        :param path: Path of the file.
+        :return: None
+        """
+        with open(path, 'a') as f:
+            for when, name, phase, seconds, thread in list(self.records):
+                f.write(json.dumps({'time': when, 'name': name, 'phase': phase,
+                                    'ms': seconds * 1000, 'thread': thread}) + '\n')
+
+
+def percentile(values, q):
+    """
+    Find a percentile with linear interpolation, like numpy.percentile.
+    :param values: Sorted list of numbers, not empty.
+    :param q: Percentile between 0 and 100.
+    :return: The percentile.
+    """
+    position = (len(values) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+def timed(method):
+    """
+    Decorate a controller method to record its time as the 'handler' phase
+    in the controller's LatencyRecorder.
+    :param method: Method of an object with a 'perf' LatencyRecorder attribute.
+    :return: The decorated method.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if not self.perf.enabled:
+            return method(self, *args, **kwargs)
+        with self.perf.measure(method.__name__, 'handler'):
+            return method(self, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,153 @@
+from collections import deque
+from render_cache import RenderCache
+
+
+def neighbour_order(options, current, radius):
+    """
+    List the options around the current one, nearest first, with the next
+    option before the previous one since lists are usually walked down.
+    :param options: Sequence of options in the order they are shown.
+    :param current: The selected option.
+    :param radius: Number of options to take on each side.
+    :return: List of options.
+    """
+    options = list(options)
+    if current not in options:
+        return []
+    index = options.index(current)
+    result = []
+    for distance in range(1, radius + 1):
+        for position in (index + distance, index - distance):
+            if 0 <= position < len(options):
+                result.append(options[position])
+    return result
+
+
+class Prefetcher:
+    """
+        Create graphs of the options next to the selected one while the
+        application is idle, so selecting them only displays a cached bitmap.
+        One graph is created at a time and only when no graph the user asked
+        for is being created. Input cancels a graph that is not started yet,
+        the rest continue when the application is idle again.
+
+        Attributes:
+            controller: The YouTubeController whose render pipeline creates the graphs.
+            cache: RenderCache of prefetched graphs, separate so they never evict
+                   graphs the user has seen.
+            radius: Number of options prefetched on each side of the selected one.
+            queue: Deque of (cache key, method, args, size) to create.
+            future: Future of the graph being created, or None.
+            current: (cache key, method, args, size) of the graph being created.
+            created: Number of graphs created.
+            used: Number of prefetched graphs that were asked for.
+    """
+
+    def __init__(self, controller, max_bytes=64 * 1024 * 1024, radius=2):
+        """
+        Initialize a Prefetcher object.
+        :param controller: The YouTubeController.
+        :param max_bytes: Maximum total size of the prefetched graphs.
+        :param radius: Number of options prefetched on each side of the selected one.
+        """
+        self.controller = controller
+        self.cache = RenderCache(max_bytes)
+        self.radius = radius
+        self.queue = deque()
+        self.future = None
+        self.current = None
+        self.created = 0
+        self.used = 0
+        self._idle_job = None
+
+    def take(self, key):
+        """
+        Get a prefetched graph.
+        :param key: The render cache key of the graph.
+        :return: RGBA array, or None if it is not prefetched.
+        """
+        image = self.cache.get(key)
+        if image is not None:
+            self.used += 1
+        return image
+
+    def schedule(self, method, args_list, size, view_version):
+        """
+        Replace the graphs waiting to be prefetched and start when idle.
+        :param method: The StoryTelling method that creates the graphs.
+        :param args_list: List of arguments of each graph, most likely first.
+        :param size: (width, height) in pixels to rasterize the graphs at.
+        :param view_version: Version of the data and the filter the graphs are created from.
+        :return: None
+        """
+        self.queue.clear()
+        for args in args_list:
+            key = RenderCache.make_key(method.__name__, args, view_version, size)
+            self.queue.append((key, method, args, size))
+        self.resume()
+
+    def resume(self):
+        """
+        Continue prefetching the next time the application is idle.
+        :return: None
+        """
+        if self._idle_job is None and self.queue:
+            self._idle_job = self.controller.view.after_idle(self.run_next)
+
+    def run_next(self):
+        """
+        Start creating the next graph, if no other graph is being created.
+        :return: None
+        """
+        self._idle_job = None
+        if self.future is not None:
+            return
+        pipeline = self.controller.pipeline
+        if not pipeline.is_idle():
+            self._idle_job = self.controller.view.after(pipeline.poll_ms, self.run_next)
+            return
+        while self.queue:
+            key, method, args, size = self.queue.popleft()
+            if key in self.cache or key in self.controller.render_cache:
+                continue
+            self.current = (key, method, args, size)
+            self.future = pipeline.submit_background(
+                method, args, size, lambda job, image: self.finish(key, image))
+            return
+
+    def finish(self, key, image):
+        """
+        Keep a prefetched graph and go on with the next one.
+        :param key: The render cache key of the graph.
+        :param image: RGBA array of the graph, or None if it is not created.
+        :return: None
+        """
+        self.future = None
+        if image is not None:
+            self.cache.put(key, image)
+            self.created += 1
+        self.resume()
+
+    def pause(self, event=None):
+        """
+        Cancel the graph being prefetched if it is not started, so input is
+        handled first. It is created again when the application is idle.
+        :param event: The Tk event of the input, if any.
+        :return: None
+        """
+        if self.future is not None and self.future.cancel():
+            self.queue.appendleft(self.current)
+            self.future = None
+        if self._idle_job is not None:
+            self.controller.view.after_cancel(self._idle_job)
+            self._idle_job = None
+        self.resume()
+
+    def cancel(self):
+        """
+        Stop prefetching, for example when the user asks for another graph or the
+        data changes.
+        :return: None
+        """
+        self.queue.clear()
+        self.pause()
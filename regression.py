@@ -0,0 +1,159 @@
+from statistics import NormalDist
+import numpy as np
+
+
+def t_quantile(p, df):
+    """
+    Quantile of Student's t distribution, from the Cornish-Fisher expansion around
+    the normal quantile, accurate to about 1e-3 for 3 or more degrees of freedom
+    without needing scipy.
+    :param p: Probability between 0 and 1.
+    :param df: Degrees of freedom.
+    :return: The quantile.
+    """
+    z = NormalDist().inv_cdf(p)
+    if df <= 0:
+        return np.nan
+    z2 = z * z
+    return (z + (z2 + 1) * z / (4 * df)
+            + ((5 * z2 + 16) * z2 + 3) * z / (96 * df ** 2)
+            + (((3 * z2 + 19) * z2 + 17) * z2 - 15) * z / (384 * df ** 3)
+            + ((((79 * z2 + 776) * z2 + 1482) * z2 - 1920) * z2 - 945) * z / (92160 * df ** 4))
+
+
+class LineFit:
+    """
+        Ordinary least squares line with the covariance of its estimates, for the
+        confidence band of its mean found in closed form instead of by bootstrapping.
+
+        Attributes:
+            n: Number of points.
+            x_mean: Mean of x.
+            y_mean: Mean of y.
+            slope: Slope of the line.
+            intercept: Intercept of the line.
+            var_mean: Variance of the fitted y at x_mean.
+            var_slope: Variance of the slope.
+            cov: Covariance of the fitted y at x_mean and the slope.
+    """
+
+    def __init__(self, n, x_mean, y_mean, slope, var_mean, var_slope, cov=0.0):
+        """
+        Initialize a LineFit object.
+        :param n: Number of points.
+        :param x_mean: Mean of x.
+        :param y_mean: Mean of y.
+        :param slope: Slope of the line.
+        :param var_mean: Variance of the fitted y at x_mean.
+        :param var_slope: Variance of the slope.
+        :param cov: Covariance of the fitted y at x_mean and the slope.
+        """
+        self.n = n
+        self.x_mean = x_mean
+        self.y_mean = y_mean
+        self.slope = slope
+        self.intercept = y_mean - slope * x_mean if n > 0 else np.nan
+        self.var_mean = var_mean
+        self.var_slope = var_slope
+        self.cov = cov
+
+    @classmethod
+    def from_data(cls, x, y):
+        """
+        Fit a line to points, ignoring missing values. The covariance is the
+        heteroscedasticity consistent (HC1) one, which is what seaborn's bootstrap of
+        the points estimates, since the spread of YouTube data grows with its size.
+        :param x: Array of x values.
+        :param y: Array of y values.
+        :return: LineFit object.
+        """
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        valid = np.isfinite(x) & np.isfinite(y)
+        x = x[valid]
+        y = y[valid]
+        n = x.size
+        if n == 0:
+            return cls(0, np.nan, np.nan, 0.0, np.nan, np.nan)
+        x_mean = x.mean()
+        y_mean = y.mean()
+        dx = x - x_mean
+        dy = y - y_mean
+        sxx = dx @ dx
+        slope = (dx @ dy) / sxx if sxx > 0 else 0.0
+        if n <= 2 or sxx <= 0:
+            return cls(n, x_mean, y_mean, slope, np.nan, np.nan)
+        e2 = np.square(dy - slope * dx) * (n / (n - 2))
+        return cls(n, x_mean, y_mean, slope, e2.sum() / n ** 2,
+                   (e2 @ np.square(dx)) / sxx ** 2, (e2 @ dx) / (n * sxx))
+
+    @classmethod
+    def from_moments(cls, moments, x_index, y_index):
+        """
+        Fit a line from the cross product matrix of [1, columns...], so the line of
+        data that is not in memory can be found from its aggregates. The residuals
+        are not known, so the covariance assumes they have the same spread everywhere.
+        :param moments: Square array where moments[i, j] is the sum of column i * column j,
+                        and column 0 is the constant 1.
+        :param x_index: Index of the x column in moments.
+        :param y_index: Index of the y column in moments.
+        :return: LineFit object.
+        """
+        n = moments[0, 0]
+        if n == 0:
+            return cls(0, np.nan, np.nan, 0.0, np.nan, np.nan)
+        x_mean = moments[0, x_index] / n
+        y_mean = moments[0, y_index] / n
+        sxx = moments[x_index, x_index] - n * x_mean * x_mean
+        sxy = moments[x_index, y_index] - n * x_mean * y_mean
+        syy = moments[y_index, y_index] - n * y_mean * y_mean
+        slope = sxy / sxx if sxx > 0 else 0.0
+        if n <= 2 or sxx <= 0:
+            return cls(n, x_mean, y_mean, slope, np.nan, np.nan)
+        # rounding can make the residual sum slightly negative for a perfect fit
+        residual_var = max(syy - slope * sxy, 0.0) / (n - 2)
+        return cls(n, x_mean, y_mean, slope, residual_var / n, residual_var / sxx)
+
+    def predict(self, x):
+        """
+        Find points on the line.
+        :param x: Array of x values.
+        :return: Array of y values.
+        """
+        return self.slope * np.asarray(x, dtype=np.float64) + self.intercept
+
+    def band(self, x, level=0.95):
+        """
+        Find the confidence band of the mean of y.
+        :param x: Array of x values.
+        :param level: Confidence level.
+        :return: (lower, upper) arrays of y values, or None if the band is not defined.
+        """
+        if not np.isfinite(self.var_slope):
+            return None
+        dx = np.asarray(x, dtype=np.float64) - self.x_mean
+        variance = np.maximum(self.var_mean + dx * (2 * self.cov + dx * self.var_slope), 0)
+        error = t_quantile((1 + level) / 2, self.n - 2) * np.sqrt(variance)
+        y = self.predict(x)
+        return y - error, y + error
+
+
+def draw_fit(ax, fit, x_min, x_max, color, linewidth=2, level=0.95, points=100):
+    """
+    Draw a regression line and the confidence band of its mean, like seaborn.regplot.
+    :param ax: The matplotlib axes to draw on.
+    :param fit: LineFit to draw.
+    :param x_min: Smallest x of the line.
+    :param x_max: Largest x of the line.
+    :param color: Color of the line and the band.
+    :param linewidth: Width of the line.
+    :param level: Confidence level of the band, or None to draw only the line.
+    :param points: Number of points along the line where the band is found.
+    :return: None
+    """
+    grid = np.linspace(x_min, x_max, points)
+    line, = ax.plot(grid, fit.predict(grid), color=color, linewidth=linewidth)
+    line.sticky_edges.x[:] = (x_min, x_max)
+    band = fit.band(grid, level) if level is not None else None
+    if band is not None:
+        ax.fill_between(grid, *band, facecolor=color, alpha=.15)
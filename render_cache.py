@@ -0,0 +1,123 @@
+import io
+from collections import OrderedDict
+
+
+class RenderCache:
+    """
+        A least recently used cache of rendered graphs with a memory budget.
+
+        Attributes:
+            max_bytes: Maximum total size of the cached images.
+            current_bytes: Total size of the cached images.
+            hits: Number of lookups that found an image.
+            misses: Number of lookups that did not find an image.
+    """
+
+    def __init__(self, max_bytes=128 * 1024 * 1024):
+        """
+        Initialize a RenderCache object.
+        :param max_bytes: Maximum total size of the cached images.
+        """
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._images = OrderedDict()
+
+    @staticmethod
+    def make_key(method, args, data_version, size):
+        """
+        Create a cache key of a graph.
+        :param method: Name of the StoryTelling method that creates the graph.
+        :param args: Arguments of the method.
+        :param data_version: Version of the data the graph is created from.
+        :param size: (width, height) of the canvas in pixels, or None.
+        :return: Hashable key.
+        """
+        return method, tuple(args), data_version, size
+
+    @staticmethod
+    def image_size(image):
+        """
+        Get size of an image in bytes.
+        :param image: PNG bytes or RGBA array.
+        :return: Number of bytes.
+        """
+        return image.nbytes if hasattr(image, 'nbytes') else len(image)
+
+    def get(self, key):
+        """
+        Get a cached image and mark it as recently used.
+        :param key: The cache key.
+        :return: The image, or None if it is not cached.
+        """
+        image = self._images.get(key)
+        if image is None:
+            self.misses += 1
+            return None
+        self._images.move_to_end(key)
+        self.hits += 1
+        return image
+
+    def put(self, key, image):
+        """
+        Cache an image, evicting least recently used images when over budget.
+        :param key: The cache key.
+        :param image: PNG bytes or RGBA array.
+        :return: None
+        """
+        size = self.image_size(image)
+        if size > self.max_bytes:
+            return
+        if key in self._images:
+            self.current_bytes -= self.image_size(self._images.pop(key))
+        self._images[key] = image
+        self.current_bytes += size
+        while self.current_bytes > self.max_bytes:
+            _, evicted = self._images.popitem(last=False)
+            self.current_bytes -= self.image_size(evicted)
+
+    def clear(self):
+        """
+        Remove every cached image.
+        :return: None
+        """
+        self._images.clear()
+        self.current_bytes = 0
+
+    def __contains__(self, key):
+        return key in self._images
+
+    def __len__(self):
+        return len(self._images)
+
+
+def figure_to_png(fig, size=None):
+    """
+    Rasterize a figure with Agg to PNG bytes.
+    :param fig: The matplotlib figure object.
+    :param size: (width, height) in pixels to resize the figure to, or None.
+    :return: PNG bytes.
+    """
+    if size is not None:
+        fig.set_size_inches(size[0] / fig.dpi, size[1] / fig.dpi)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=fig.dpi)
+    return buffer.getvalue()
+
+
+def figure_to_rgba(fig, size=None):
+    """
+    Rasterize a figure with Agg to an RGBA array.
+    :param fig: The matplotlib figure object.
+    :param size: (width, height) in pixels to resize the figure to, or None.
+    :return: Array of shape (height, width, 4) with dtype uint8.
+    """
+    # imported on first use, so importing the cache does not slow down startup
+    import numpy as np
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    if size is not None:
+        fig.set_size_inches(size[0] / fig.dpi, size[1] / fig.dpi)
+    canvas = FigureCanvasAgg(fig)
+    canvas.draw()
+    return np.asarray(canvas.buffer_rgba()).copy()
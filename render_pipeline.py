@@ -0,0 +1,170 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from perf_monitor import LatencyRecorder
+from render_cache import figure_to_rgba
+
+
+class RenderJob:
+    """
+        A request to create and rasterize one graph.
+
+        Attributes:
+            target: The canvas that will display graph, or None for a background job.
+            token: Number that increases with every request, used to find superseded jobs.
+            size: (width, height) in pixels to rasterize the graph at, or None.
+            figure: The figure created by the StoryTelling method.
+            name: Name of the StoryTelling method.
+            submitted: perf_counter() time the job was submitted.
+    """
+
+    def __init__(self, target, token, size, name=None):
+        """
+        Initialize a RenderJob object.
+        :param target: The canvas that will display graph.
+        :param token: Number of the request.
+        :param size: (width, height) in pixels to rasterize the graph at, or None.
+        :param name: Name of the StoryTelling method.
+        """
+        self.target = target
+        self.token = token
+        self.size = size
+        self.figure = None
+        self.name = name
+        self.submitted = time.perf_counter()
+
+
+class RenderPipeline:
+    """
+        Create and rasterize graphs in worker threads, so the Tk main loop stays
+        responsive. Results are handed back to the main thread with after() callbacks.
+
+        Attributes:
+            widget: Tk widget used to schedule after() callbacks on the main thread.
+            poll_ms: Milliseconds between checking whether a job is done.
+            recorder: LatencyRecorder of the queue, compute and rasterize phases.
+    """
+
+    def __init__(self, widget, workers=1, poll_ms=30, recorder=None):
+        """
+        Initialize a RenderPipeline object.
+        :param widget: Tk widget used to schedule after() callbacks.
+        :param workers: Number of worker threads. Text rendering of matplotlib is not
+                        thread-safe, so more than one worker can garble labels.
+        :param poll_ms: Milliseconds between checking whether a job is done.
+        :param recorder: LatencyRecorder to record timings to, or None to not record.
+        """
+        self.widget = widget
+        self.poll_ms = poll_ms
+        self.recorder = recorder if recorder is not None else LatencyRecorder()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='render')
+        self._local = threading.local()
+        self._token = 0
+        self._latest = {}
+        self._pending = {}
+
+    def current_job(self):
+        """
+        Get the job that is running in the current thread.
+        :return: The RenderJob, or None when not called from a worker.
+        """
+        return getattr(self._local, 'job', None)
+
+    def submit(self, target, method, args, size, on_done):
+        """
+        Create a graph in a worker thread. A request that is not started yet
+        for the same target is cancelled, and one that is running is ignored
+        when it finishes.
+        :param target: The canvas that will display graph.
+        :param method: The StoryTelling method that creates the graph.
+        :param args: Arguments of the method.
+        :param size: (width, height) in pixels to rasterize the graph at, or None.
+        :param on_done: Function called on the main thread with the job and RGBA array.
+        :return: The RenderJob.
+        """
+        self.cancel(target)
+        job = RenderJob(target, self._token, size, method.__name__)
+        future = self._executor.submit(self._run, job, method, args)
+        self._pending[target] = future
+        self.widget.after(self.poll_ms, self._poll, job, future, on_done)
+        return job
+
+    def submit_background(self, method, args, size, on_done):
+        """
+        Create a graph in a worker thread without displaying it, for example to
+        cache it before it is asked for. It is not cancelled by other requests.
+        :param method: The StoryTelling method that creates the graph.
+        :param args: Arguments of the method.
+        :param size: (width, height) in pixels to rasterize the graph at, or None.
+        :param on_done: Function called on the main thread with the job and RGBA array.
+        :return: Future of the job, cancelling it drops the job if it is not started.
+        """
+        job = RenderJob(None, None, size, method.__name__)
+        future = self._executor.submit(self._run, job, method, args)
+        self.widget.after(self.poll_ms, self._poll, job, future, on_done)
+        return future
+
+    def is_idle(self):
+        """
+        Check whether no graph is being created for a target.
+        :return: True if no request for a target is pending.
+        """
+        return not self._pending
+
+    def cancel(self, target):
+        """
+        Cancel the request for the target, if any.
+        :param target: The canvas that will display graph.
+        :return: None
+        """
+        self._token += 1
+        self._latest[target] = self._token
+        future = self._pending.pop(target, None)
+        if future is not None:
+            future.cancel()
+
+    def shutdown(self):
+        """
+        Stop the worker threads, dropping requests that are not started.
+        :return: None
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job, method, args):
+        """
+        Run the StoryTelling method and rasterize its figure in a worker thread.
+        :return: RGBA array, or None if the method did not create a figure.
+        """
+        self.recorder.record(job.name, 'queue', time.perf_counter() - job.submitted)
+        self._local.job = job
+        try:
+            with self.recorder.measure(job.name, 'compute'):
+                method(*args)
+        finally:
+            self._local.job = None
+        if job.figure is None:
+            return None
+        with self.recorder.measure(job.name, 'rasterize'):
+            return figure_to_rgba(job.figure, job.size)
+
+    def _poll(self, job, future, on_done):
+        """
+        Check on the main thread whether the job is done.
+        :return: None
+        """
+        if not future.done():
+            self.widget.after(self.poll_ms, self._poll, job, future, on_done)
+            return
+        if future.cancelled():
+            return
+        if job.target is not None:
+            if self._latest.get(job.target) != job.token:
+                return
+            del self._pending[job.target]
+        try:
+            image = future.result()
+        except Exception as error:
+            on_done(job, None)
+            self.widget.report_callback_exception(type(error), error, error.__traceback__)
+            return
+        on_done(job, image)
@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+
+
+def intersect_rows(*rows):
+    """
+    Find the rows in every one of several sorted arrays of row positions (AND).
+    Each row of the smallest array is looked up in the others by binary search,
+    so the cost follows the number of matching rows, not the size of the table.
+    :param rows: Sorted arrays of unique row positions.
+    :return: Sorted array of row positions.
+    """
+    rows = sorted(rows, key=len)
+    result = rows[0]
+    for other in rows[1:]:
+        if result.size == 0 or other.size == 0:
+            return result[:0]
+        positions = np.minimum(np.searchsorted(other, result), other.size - 1)
+        result = result[other[positions] == result]
+    return result
+
+
+def union_rows(*rows):
+    """
+    Find the rows in any of several sorted arrays of row positions (OR).
+    :param rows: Sorted arrays of unique row positions.
+    :return: Sorted array of row positions.
+    """
+    rows = [part for part in rows if part.size]
+    if not rows:
+        return np.empty(0, dtype=np.intp)
+    if len(rows) == 1:
+        return rows[0]
+    # a stable sort merges the sorted runs instead of sorting from scratch
+    result = np.sort(np.concatenate(rows), kind='stable')
+    return result[np.concatenate(([True], result[1:] != result[:-1]))]
+
+
+class RowIndex:
+    """
+        Row positions of each distinct value of a column, kept as one array of
+        positions sorted by value, so the rows of a value are a slice of it
+        instead of a comparison of the whole column. The positions of a value
+        are sorted, so they combine with intersect_rows and union_rows and
+        gather rows in the order of the data.
+
+        Attributes:
+            column: Name of the indexed column.
+            size: Number of rows of the indexed data.
+            values: Index of the distinct values, sorted.
+            order: Array of row positions grouped by value, in the order of values.
+            starts: Array where the rows of values[i] are order[starts[i]:starts[i + 1]].
+    """
+
+    def __init__(self, data, column):
+        """
+        Build the index with one stable sort of the value codes.
+        :param data: DataFrame to index.
+        :param column: Name of the column to index.
+        """
+        self.column = column
+        self.size = len(data)
+        values = data[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.cat.remove_unused_categories()
+            if values.cat.ordered or values.cat.categories.is_monotonic_increasing:
+                codes = values.cat.codes.to_numpy()
+                uniques = values.cat.categories
+            else:
+                codes, uniques = pd.factorize(values, sort=True)
+        else:
+            codes, uniques = pd.factorize(values, sort=True)
+        codes = np.asarray(codes)
+        self.values = pd.Index(uniques)
+        self.order = np.argsort(codes, kind='stable').astype(np.intp)
+        # missing values have code -1 and are sorted before every value
+        counts = np.bincount(codes + 1, minlength=len(uniques) + 1)
+        self.starts = np.cumsum(counts)
+
+    def rows(self, value):
+        """
+        Get the rows with a value.
+        :param value: The value.
+        :return: Sorted array of row positions, a view that must not be changed.
+        """
+        position = self.values.get_indexer([value])[0]
+        if position < 0:
+            return self.order[:0]
+        return self.order[self.starts[position]:self.starts[position + 1]]
+
+    def any_of(self, values):
+        """
+        Get the rows with any of several values.
+        :param values: Iterable of values.
+        :return: Sorted array of row positions, which must not be changed.
+        """
+        return union_rows(*[self.rows(value) for value in values])
+
+    def between(self, low, high):
+        """
+        Get the rows with a value from low to high, both included. Values are
+        contiguous in order, so the range is a single slice.
+        :param low: Smallest value, or None for no lower bound.
+        :param high: Largest value, or None for no upper bound.
+        :return: Sorted array of row positions.
+        """
+        first = 0 if low is None else self.values.searchsorted(low, side='left')
+        last = len(self.values) if high is None else self.values.searchsorted(high, side='right')
+        if first >= last:
+            return self.order[:0]
+        return np.sort(self.order[self.starts[first]:self.starts[last]], kind='stable')
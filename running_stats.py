@@ -0,0 +1,161 @@
+import copy
+import numpy as np
+import pandas as pd
+from data_cube import CUBE_COLUMNS
+from sketches import GroupedSketches
+
+PERCENTILES = [0.25, 0.50, 0.75]
+
+
+class RunningStats:
+    """
+        Count, mean, variance, minimum and maximum of each numeric column for each
+        category, plus quantile sketches for percentiles. Appending rows only
+        aggregates the new rows and combines them with the kept statistics,
+        using the parallel form of Welford's method, so the variance stays accurate
+        for large values where a sum of squares loses precision.
+
+        Attributes:
+            columns: Names of the numeric columns.
+            counts: DataFrame of number of values of each column for each category.
+            means: DataFrame of mean of each column for each category.
+            m2: DataFrame of sum of squared differences from the mean for each category.
+            mins: DataFrame of minimum of each column for each category.
+            maxs: DataFrame of maximum of each column for each category.
+            sketches: GroupedSketches of the numeric columns for each category.
+    """
+
+    def __init__(self, columns=CUBE_COLUMNS, k=200):
+        """
+        Initialize an empty RunningStats object.
+        :param columns: Names of the numeric columns.
+        :param k: Capacity of each quantile sketch.
+        """
+        self.columns = list(columns)
+        empty = pd.DataFrame(columns=self.columns, dtype='float64')
+        self.counts = empty
+        self.means = empty
+        self.m2 = empty
+        self.mins = empty
+        self.maxs = empty
+        self.sketches = GroupedSketches(self.columns, k)
+
+    def update(self, rows):
+        """
+        Add rows to the statistics.
+        :param rows: DataFrame with 'category' and the numeric columns.
+        :return: None
+        """
+        if rows.empty:
+            return
+        values = rows[self.columns].astype('float64')
+        grouped = values.groupby(rows['category'].astype(object), observed=True)
+        counts = grouped.count()
+        self.combine(counts, grouped.mean(), grouped.var(ddof=0).fillna(0) * counts,
+                     grouped.min(), grouped.max())
+        self.sketches.update(rows, 'category')
+
+    def replace_categories(self, rows, categories):
+        """
+        Rebuild the statistics of some categories, for example after rows of those
+        categories are removed, since values can not be taken out of a sketch.
+        :param rows: DataFrame of every row of the categories.
+        :param categories: The categories to rebuild.
+        :return: None
+        """
+        kept = ~self.counts.index.isin(categories)
+        self.counts = self.counts[kept]
+        self.means = self.means[kept]
+        self.m2 = self.m2[kept]
+        self.mins = self.mins[kept]
+        self.maxs = self.maxs[kept]
+        self.sketches.sketches = {(group, column): sketch for (group, column), sketch
+                                  in self.sketches.sketches.items() if group not in categories}
+        self.update(rows)
+
+    def copy(self):
+        """
+        Copy the statistics, so the copy can be updated while the original is read.
+        :return: New RunningStats object.
+        """
+        result = copy.copy(self)
+        result.sketches = self.sketches.copy()
+        return result
+
+    def merge(self, other):
+        """
+        Add the statistics of another part of the data.
+        :param other: The RunningStats to merge.
+        :return: None
+        """
+        self.combine(other.counts, other.means, other.m2, other.mins, other.maxs)
+        self.sketches.merge(other.sketches)
+
+    def combine(self, counts, means, m2, mins, maxs):
+        """
+        Combine statistics of new values with the kept statistics of each category.
+        :param counts: DataFrame of number of new values for each category.
+        :param means: DataFrame of mean of new values for each category.
+        :param m2: DataFrame of sum of squared differences from the mean of new values.
+        :param mins: DataFrame of minimum of new values for each category.
+        :param maxs: DataFrame of maximum of new values for each category.
+        :return: None
+        """
+        index = self.counts.index.union(counts.index, sort=False)
+        count_a = self.counts.reindex(index, fill_value=0)
+        count_b = counts.reindex(index, fill_value=0)
+        mean_a = self.means.reindex(index).fillna(0)
+        mean_b = means.reindex(index).fillna(0)
+        total = count_a + count_b
+        share = (count_b / total.where(total > 0)).fillna(0)
+        delta = mean_b - mean_a
+        self.means = mean_a + delta * share
+        self.m2 = (self.m2.reindex(index).fillna(0) + m2.reindex(index).fillna(0)
+                   + delta ** 2 * count_a * share)
+        self.counts = total
+        self.mins = pd.concat([self.mins, mins]).groupby(level=0).min().reindex(index)
+        self.maxs = pd.concat([self.maxs, maxs]).groupby(level=0).max().reindex(index)
+
+    def total(self):
+        """
+        Combine the statistics of every category.
+        :return: (count, mean, m2, min, max), each a Series indexed by column.
+        """
+        count = self.counts.sum()
+        mean = (self.means * self.counts).sum() / count.where(count > 0)
+        m2 = self.m2.sum() + ((self.means - mean) ** 2 * self.counts).sum()
+        return count, mean, m2, self.mins.min(), self.maxs.max()
+
+    def percentiles(self, column, category=None):
+        """
+        Estimate percentiles of a column with the sketches.
+        :param column: The numeric column name.
+        :param category: The category, or None for every channel.
+        :return: Array of the PERCENTILES of the column.
+        """
+        if category is not None:
+            return self.sketches.get(category, column).quantile(PERCENTILES)
+        sketch = self.sketches.new_sketch('all', column)
+        for group in self.sketches.groups():
+            sketch.merge(self.sketches.get(group, column))
+        return sketch.quantile(PERCENTILES)
+
+    def describe(self, category=None):
+        """
+        Get descriptive statistics of the numeric columns like DataFrame.describe.
+        :param category: The category, or None for every channel.
+        :return: DataFrame with 'count', 'mean', 'std', 'min', '25%', '50%', '75%'
+                 and 'max' rows and a column for each numeric column.
+        """
+        if category is None:
+            count, mean, m2, low, high = self.total()
+        else:
+            count, mean, m2 = (self.counts.loc[category], self.means.loc[category],
+                               self.m2.loc[category])
+            low, high = self.mins.loc[category], self.maxs.loc[category]
+        std = np.sqrt(m2 / (count - 1).where(count > 1))
+        percentiles = pd.DataFrame({column: self.percentiles(column, category)
+                                    for column in self.columns},
+                                   index=[f'{q:.0%}' for q in PERCENTILES])
+        summary = pd.DataFrame({'count': count, 'mean': mean, 'std': std, 'min': low}).T
+        return pd.concat([summary, percentiles, pd.DataFrame({'max': high}).T])
@@ -0,0 +1,300 @@
+import copy
+import math
+import zlib
+import numpy as np
+
+
+class QuantileSketch:
+    """
+        A KLL quantile sketch. Values can be added in batches and sketches built
+        from different parts of the data can be merged. Quantiles are exact while
+        fewer values than the capacity are added, and approximate afterward.
+
+        Attributes:
+            k: Capacity of the top compactor, larger is more accurate.
+            count: Number of values added.
+            min: The smallest value added.
+            max: The largest value added.
+            compactors: Arrays of kept values, values at level i have weight 2 ** i.
+    """
+
+    def __init__(self, k=200, seed=None):
+        """
+        Initialize a QuantileSketch object.
+        :param k: Capacity of the top compactor.
+        :param seed: Seed of the random offsets used when compacting.
+        """
+        self.k = k
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.compactors = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def capacity(self, level):
+        """
+        Get number of values a compactor can keep before it is compacted.
+        :param level: Level of the compactor.
+        :return: Capacity of the compactor.
+        """
+        depth = len(self.compactors) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def update(self, values):
+        """
+        Add values to the sketch, missing values are ignored.
+        :param values: Array-like of numbers.
+        :return: None
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+        self.count += values.size
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.compactors[0] = np.concatenate([self.compactors[0], values])
+        self.compress()
+
+    def merge(self, other):
+        """
+        Add every value of another sketch to this sketch.
+        :param other: The QuantileSketch to merge.
+        :return: None
+        """
+        if other.count == 0:
+            return
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append(np.empty(0))
+        for level, items in enumerate(other.compactors):
+            self.compactors[level] = np.concatenate([self.compactors[level], items])
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.compress()
+
+    def compress(self):
+        """
+        Compact every compactor over its capacity, keeping every other sorted
+        value with double weight on the next level.
+        :return: None
+        """
+        level = 0
+        while level < len(self.compactors):
+            items = self.compactors[level]
+            if len(items) > self.capacity(level):
+                if level + 1 == len(self.compactors):
+                    self.compactors.append(np.empty(0))
+                items = np.sort(items)
+                # an odd value out stays on this level
+                even = len(items) - len(items) % 2
+                offset = self._rng.integers(2)
+                self.compactors[level + 1] = np.concatenate([self.compactors[level + 1],
+                                                             items[offset:even:2]])
+                self.compactors[level] = items[even:]
+                # capacities of lower levels shrink when a level is added
+                level = 0
+                continue
+            level += 1
+
+    def is_exact(self):
+        """
+        Check whether every added value is still kept.
+        :return: True if quantiles are exact.
+        """
+        return all(len(items) == 0 for items in self.compactors[1:])
+
+    def quantile(self, q):
+        """
+        Estimate quantiles of the added values. While the sketch is exact the result
+        is the same as pandas quantile with linear interpolation.
+        :param q: A quantile or list of quantiles between 0 and 1.
+        :return: A float or array of floats, NaN if the sketch is empty.
+        """
+        q = np.asarray(q, dtype=np.float64)
+        if self.count == 0:
+            return np.full(q.shape, np.nan) if q.ndim else math.nan
+        if self.is_exact():
+            result = np.quantile(self.compactors[0], q)
+        else:
+            values = np.concatenate(self.compactors)
+            weights = np.concatenate([np.full(len(items), 2.0 ** level)
+                                      for level, items in enumerate(self.compactors)])
+            order = np.argsort(values)
+            values = values[order]
+            weights = weights[order]
+            rank = np.cumsum(weights) - weights / 2
+            result = np.interp(q * weights.sum(), rank, values)
+            result = np.clip(result, self.min, self.max)
+        return float(result) if result.ndim == 0 else result
+
+    def values(self):
+        """
+        Get every kept value. While the sketch is exact these are the added values,
+        afterward a sample of them.
+        :return: Array of values, not sorted.
+        """
+        return np.concatenate(self.compactors)
+
+    def rank(self, value):
+        """
+        Estimate the fraction of added values that are smaller than or equal to a value.
+        :param value: A number.
+        :return: Fraction between 0 and 1, NaN if the sketch is empty.
+        """
+        if self.count == 0:
+            return math.nan
+        total = 0.0
+        for level, items in enumerate(self.compactors):
+            total += np.count_nonzero(items <= value) * 2.0 ** level
+        weight = sum(len(items) * 2.0 ** level for level, items in enumerate(self.compactors))
+        return total / weight
+
+
+def sketch_seed(group, column):
+    """
+    Derive the seed of the sketch of a (group, column) from its key, so the same
+    data gives the same sketch in every run and every process.
+    :param group: The group, a value or tuple of values.
+    :param column: The numeric column name.
+    :return: Seed as a non-negative int.
+    """
+    parts = group if isinstance(group, tuple) else (group,)
+    return zlib.crc32('/'.join(str(part) for part in (*parts, column)).encode())
+
+
+class GroupedSketches:
+    """
+        A QuantileSketch for each (group, column). Sketches can be built one chunk
+        at a time and merged with sketches of other chunks or processes.
+
+        Attributes:
+            columns: Names of the numeric columns.
+            k: Capacity of each sketch.
+            sketches: Dict of (group, column) to QuantileSketch.
+    """
+
+    def __init__(self, columns, k=200):
+        """
+        Initialize an empty GroupedSketches object.
+        :param columns: Names of the numeric columns.
+        :param k: Capacity of each sketch.
+        """
+        self.columns = list(columns)
+        self.k = k
+        self.sketches = {}
+
+    def update(self, data, by):
+        """
+        Add rows of a DataFrame to the sketches of their group.
+        :param data: DataFrame with the group columns and numeric columns.
+        :param by: Column name or list of column names to group by.
+        :return: None
+        """
+        values = {column: data[column].to_numpy() for column in self.columns}
+        for group, positions in data.groupby(by, observed=True).indices.items():
+            for column in self.columns:
+                key = (group, column)
+                if key not in self.sketches:
+                    self.sketches[key] = self.new_sketch(group, column)
+                self.sketches[key].update(values[column][positions])
+
+    def merge(self, other):
+        """
+        Add every sketch of another GroupedSketches object.
+        :param other: The GroupedSketches to merge.
+        :return: None
+        """
+        for key, sketch in other.sketches.items():
+            if key not in self.sketches:
+                self.sketches[key] = self.new_sketch(*key)
+            self.sketches[key].merge(sketch)
+
+    def copy(self):
+        """
+        Copy the sketches, so the copy can be updated while the original is read.
+        :return: New GroupedSketches object.
+        """
+        result = GroupedSketches(self.columns, self.k)
+        result.sketches = copy.deepcopy(self.sketches)
+        return result
+
+    def margin(self, position):
+        """
+        Merge sketches of groups that have the same key at a position, for example
+        the category margin of (created_year, category) sketches.
+        :param position: Position in the group key tuple to keep.
+        :return: New GroupedSketches keyed by that part of the group key.
+        """
+        result = GroupedSketches(self.columns, self.k)
+        for (group, column), sketch in self.sketches.items():
+            key = (group[position], column)
+            if key not in result.sketches:
+                result.sketches[key] = result.new_sketch(*key)
+            result.sketches[key].merge(sketch)
+        return result
+
+    def new_sketch(self, group, column):
+        """
+        Create an empty sketch for a (group, column), seeded from the key.
+        :param group: The group.
+        :param column: The numeric column name.
+        :return: QuantileSketch object.
+        """
+        return QuantileSketch(self.k, sketch_seed(group, column))
+
+    def groups(self):
+        """
+        Get every group that has a sketch.
+        :return: List of groups.
+        """
+        return list(dict.fromkeys(group for group, _ in self.sketches))
+
+    def get(self, group, column):
+        """
+        Get the sketch of a group and column.
+        :param group: The group.
+        :param column: The numeric column name.
+        :return: The QuantileSketch, or an empty sketch if the group has no rows.
+        """
+        sketch = self.sketches.get((group, column))
+        return sketch if sketch is not None else self.new_sketch(group, column)
+
+    def box_stats(self, group, column, whisker=1.5):
+        """
+        Estimate box plot statistics of a column in a group after values outside
+        the 1.5 IQR bounds are removed, without sorting the values. While the
+        sketch is exact the statistics are exact.
+        :param group: The group.
+        :param column: The numeric column name.
+        :param whisker: Length of the whiskers in IQR.
+        :return: Dict that can be passed to matplotlib Axes.bxp.
+        """
+        sketch = self.get(group, column)
+        q1, q3 = sketch.quantile([0.25, 0.75])
+        iqr = q3 - q1
+        lower, upper = q1 - whisker * iqr, q3 + whisker * iqr
+        values = sketch.values()
+        values = values[(values >= lower) & (values <= upper)]
+        exact = sketch.is_exact() and values.size > 0
+        if exact:
+            # every value is kept, so the statistics are the ones seaborn draws
+            q1, med, q3 = np.quantile(values, [0.25, 0.5, 0.75])
+        else:
+            low = sketch.rank(lower)
+            high = sketch.rank(upper)
+            # quantiles of the values that are left after removing outliers
+            low_value, q1, med, q3, high_value = sketch.quantile(
+                [low, low + 0.25 * (high - low), low + 0.5 * (high - low),
+                 low + 0.75 * (high - low), high])
+        iqr = q3 - q1
+        low_bound, high_bound = q1 - whisker * iqr, q3 + whisker * iqr
+        inside = (values >= low_bound) & (values <= high_bound)
+        if exact:
+            whislo, whishi = values[inside].min(), values[inside].max()
+        else:
+            whislo, whishi = max(low_value, low_bound), min(high_value, high_bound)
+        # left values beyond the whiskers are fliers, every one of them while the
+        # sketch is exact and the ones it keeps afterward
+        return {'label': group, 'q1': q1, 'med': med, 'q3': q3,
+                'whislo': whislo, 'whishi': whishi, 'fliers': np.sort(values[~inside])}
@@ -0,0 +1,165 @@
+import copy
+import numpy as np
+import pandas as pd
+from data_cube import CUBE_COLUMNS
+from data_loader import DATA_FILE, USE_COLUMNS, DTYPES, clean_frame, add_average_earning
+from running_stats import RunningStats
+from sketches import GroupedSketches
+from topk_index import TopKIndex
+
+# categories of a chunk are only known after it is read, so keep them as text
+STREAM_DTYPES = {**DTYPES, 'category': 'object'}
+KEYS = ['created_year', 'category']
+
+
+class PartialAggregate:
+    """
+        Mergeable aggregates of a part of the YouTube data. Aggregates of
+        different chunks or processes can be merged into one.
+
+        Attributes:
+            rows: Number of rows added.
+            categories: Categories in order of first appearance.
+            counts: Number of channels for each (created_year, category).
+            sums: Sum of each numeric column for each (created_year, category).
+            mins: Minimum of each numeric column for each (created_year, category).
+            maxs: Maximum of each numeric column for each (created_year, category).
+            sketches: GroupedSketches of the numeric columns for each (created_year, category).
+            stats: RunningStats of the numeric columns for each category.
+            moments: Sums of products of every pair of [1, numeric columns...], used to
+                     fit regression lines of the whole data.
+            top: TopKIndex of the channels with the largest values for each category.
+            sample: Uniform random sample of rows for graphs that need rows.
+    """
+
+    def __init__(self, top_k=10, sample_size=50000, seed=0):
+        """
+        Initialize an empty PartialAggregate object.
+        :param top_k: Number of top channels kept for each category.
+        :param sample_size: Number of rows kept in the sample.
+        :param seed: Seed of the sample.
+        """
+        self.top_k = top_k
+        self.sample_size = sample_size
+        self.rows = 0
+        self.categories = []
+        index = pd.MultiIndex.from_tuples([], names=KEYS)
+        self.counts = pd.Series(0, index=index, dtype='int64')
+        self.sums = pd.DataFrame(columns=CUBE_COLUMNS, index=index, dtype='float64')
+        self.mins = self.sums.copy()
+        self.maxs = self.sums.copy()
+        self.sketches = GroupedSketches(CUBE_COLUMNS)
+        self.stats = RunningStats()
+        self.moments = np.zeros((len(CUBE_COLUMNS) + 1, len(CUBE_COLUMNS) + 1))
+        self.top = TopKIndex(top_k)
+        self.sample = None
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, chunk):
+        """
+        Add a chunk of cleaned rows with average monthly earning.
+        :param chunk: DataFrame of cleaned YouTube data.
+        :return: None
+        """
+        if chunk.empty:
+            return
+        other = PartialAggregate(self.top_k, self.sample_size)
+        other.rows = len(chunk)
+        other.categories = list(chunk['category'].unique())
+        values = chunk[CUBE_COLUMNS].astype('float64')
+        grouped = values.groupby([chunk['created_year'], chunk['category']], observed=True)
+        other.counts = grouped.size()
+        other.sums = grouped.sum()
+        other.mins = grouped.min()
+        other.maxs = grouped.max()
+        design = np.column_stack([np.ones(len(values)), values.to_numpy()])
+        other.moments = design.T @ design
+        other.sketches.update(chunk, KEYS)
+        other.stats.update(chunk)
+        other.top.update(chunk)
+        other.sample = chunk.assign(_key=self._rng.random(len(chunk))).nsmallest(self.sample_size,
+                                                                                  '_key')
+        self.merge(other)
+
+    def merge(self, other):
+        """
+        Add the aggregates of another part of the data. The other aggregate
+        should not be changed afterward, since its parts may be shared.
+        :param other: The PartialAggregate to merge.
+        :return: None
+        """
+        if self.rows == 0:
+            self.rows = other.rows
+            self.categories = list(other.categories)
+            self.counts, self.sums = other.counts, other.sums
+            self.mins, self.maxs = other.mins, other.maxs
+            self.sketches = other.sketches
+            self.stats = other.stats
+            self.moments = other.moments.copy()
+            self.top = other.top
+            self.sample = other.sample
+            return
+        self.rows += other.rows
+        self.categories += [c for c in other.categories if c not in self.categories]
+        self.counts = self.counts.add(other.counts, fill_value=0).astype('int64')
+        self.sums = self.sums.add(other.sums, fill_value=0)
+        self.mins = pd.concat([self.mins, other.mins]).groupby(level=KEYS).min()
+        self.maxs = pd.concat([self.maxs, other.maxs]).groupby(level=KEYS).max()
+        self.moments += other.moments
+        self.sketches.merge(other.sketches)
+        self.stats.merge(other.stats)
+        self.top.merge(other.top)
+        if other.sample is not None:
+            sample = pd.concat([self.sample, other.sample], ignore_index=True)
+            self.sample = sample.nsmallest(self.sample_size, '_key')
+
+    def copy(self):
+        """
+        Copy the aggregates, so the copy can be updated while the original is read.
+        The sample is shared, since it is replaced when rows are added.
+        :return: New PartialAggregate object.
+        """
+        result = copy.copy(self)
+        result.categories = list(self.categories)
+        result.moments = self.moments.copy()
+        result.sketches = self.sketches.copy()
+        result.stats = self.stats.copy()
+        result.top = self.top.copy()
+        return result
+
+    def sample_rows(self):
+        """
+        Get the sample without the sampling key.
+        :return: DataFrame of sampled rows.
+        """
+        return self.sample.drop(columns='_key').reset_index(drop=True)
+
+
+def read_csv_chunks(path=DATA_FILE, chunksize=100000):
+    """
+    Read the csv file in chunks and clean each chunk.
+    :param path: Path of the csv file.
+    :param chunksize: Number of rows in each chunk.
+    :return: Iterator of cleaned DataFrames with average monthly earning.
+    """
+    reader = pd.read_csv(path, encoding="latin-1", usecols=USE_COLUMNS,
+                         dtype=STREAM_DTYPES, chunksize=chunksize)
+    for chunk in reader:
+        chunk = clean_frame(chunk)
+        add_average_earning(chunk)
+        yield chunk
+
+
+def stream_csv(path=DATA_FILE, chunksize=100000, sample_size=50000):
+    """
+    Build aggregates of the csv file reading one chunk at a time, so the whole
+    file never has to fit in memory.
+    :param path: Path of the csv file.
+    :param chunksize: Number of rows in each chunk.
+    :param sample_size: Number of rows kept in the sample.
+    :return: PartialAggregate of the whole file.
+    """
+    partial = PartialAggregate(sample_size=sample_size)
+    for chunk in read_csv_chunks(path, chunksize):
+        partial.update(chunk)
+    return partial
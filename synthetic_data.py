@@ -0,0 +1,303 @@
+import argparse
+import math
+import os
+from statistics import NormalDist
+import numpy as np
+import pandas as pd
+from data_loader import DATA_FILE, USE_COLUMNS, read_csv
+
+# columns drawn together so their correlation within a category is kept
+COPULA_COLUMNS = ['subscribers', 'video views', 'uploads', 'lowest_monthly_earnings',
+                  'created_year']
+
+# characters clean_data has to remove from names, all of them can be written as latin-1
+DIRTY_NAME_PARTS = np.array([' ', '!', '_', '.', '1', '2023', ' TV', 'é', '®', '#'])
+
+
+def normal_cdf(z):
+    """
+    Standard normal cumulative distribution, Abramowitz and Stegun 7.1.26,
+    accurate to 1.5e-7 without needing scipy.
+    :param z: Array of numbers.
+    :return: Array of probabilities.
+    """
+    x = np.abs(z) / math.sqrt(2)
+    t = 1 / (1 + 0.3275911 * x)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 +
+                                                        t * (-1.453152027 + t * 1.061405429))))
+    erf = 1 - poly * np.exp(-x * x)
+    return 0.5 * (1 + np.sign(z) * erf)
+
+
+def normal_scores(values):
+    """
+    Transform values to standard normal scores of their ranks.
+    :param values: 1D array of numbers.
+    :return: Array of normal scores.
+    """
+    ranks = pd.Series(values).rank(method='average').to_numpy()
+    normal = NormalDist()
+    return np.array([normal.inv_cdf(rank / (len(values) + 1)) for rank in ranks])
+
+
+class ColumnModel:
+    """
+        Joint distribution of the numeric columns of a group of channels, an
+        empirical distribution for each column joined by a Gaussian copula.
+
+        Attributes:
+            sorted_values: Dict of column name to sorted observed values.
+            cholesky: Cholesky factor of the correlation of normal scores of COPULA_COLUMNS.
+            ratios: Sorted observed highest / lowest monthly earnings where lowest is not 0.
+            zero_highest: Sorted highest monthly earnings where lowest is 0.
+    """
+
+    def __init__(self, data):
+        """
+        Learn the distribution of a group of cleaned rows.
+        :param data: DataFrame with COPULA_COLUMNS and 'highest_monthly_earnings'.
+        """
+        self.sorted_values = {column: np.sort(data[column].to_numpy(dtype=np.float64))
+                              for column in COPULA_COLUMNS}
+        scores = np.column_stack([normal_scores(data[column].to_numpy())
+                                  for column in COPULA_COLUMNS])
+        correlation = np.nan_to_num(np.corrcoef(scores, rowvar=False))
+        np.fill_diagonal(correlation, 1)
+        # shrink toward independence until the matrix is positive definite
+        for shrink in np.linspace(0, 1, 11):
+            try:
+                self.cholesky = np.linalg.cholesky(
+                    (1 - shrink) * correlation + shrink * np.eye(len(COPULA_COLUMNS)))
+                break
+            except np.linalg.LinAlgError:
+                continue
+        lowest = data['lowest_monthly_earnings'].to_numpy()
+        highest = data['highest_monthly_earnings'].to_numpy()
+        self.ratios = np.sort(highest[lowest > 0] / lowest[lowest > 0])
+        self.zero_highest = np.sort(highest[lowest == 0])
+
+    def sample(self, rows, rng):
+        """
+        Draw rows from the distribution.
+        :param rows: Number of rows.
+        :param rng: NumPy random generator.
+        :return: Dict of column name to array of values.
+        """
+        uniform = normal_cdf(rng.standard_normal((rows, len(COPULA_COLUMNS))) @ self.cholesky.T)
+        result = {}
+        for i, column in enumerate(COPULA_COLUMNS):
+            values = self.sorted_values[column]
+            if column == 'created_year':
+                # years are not interpolated, so they stay whole years that were observed
+                result[column] = values[np.minimum((uniform[:, i] * len(values)).astype(int),
+                                                   len(values) - 1)]
+            else:
+                result[column] = np.interp(uniform[:, i] * (len(values) - 1),
+                                           np.arange(len(values)), values)
+        lowest = result['lowest_monthly_earnings']
+        ratio = self.draw(self.ratios, rows, rng, 16.0)
+        zero_highest = self.draw(self.zero_highest, rows, rng, 0.0)
+        result['highest_monthly_earnings'] = np.where(lowest > 0, lowest * ratio, zero_highest)
+        return result
+
+    @staticmethod
+    def draw(values, rows, rng, default):
+        """
+        Draw observed values with replacement.
+        :param values: Array of observed values.
+        :param rows: Number of values to draw.
+        :param rng: NumPy random generator.
+        :param default: Value used when nothing was observed.
+        :return: Array of values.
+        """
+        if len(values) == 0:
+            return np.full(rows, default)
+        return values[rng.integers(len(values), size=rows)]
+
+
+class SyntheticDataGenerator:
+    """
+        Generator of YouTube data with the columns of the Global YouTube Statistics
+        csv file and distributions learned from it. Rows are made in chunks,
+        so files of any size can be written in bounded memory.
+
+        Attributes:
+            categories: Array of category names.
+            weights: Share of rows of each category.
+            models: Dict of category to ColumnModel, for categories with enough rows.
+            pooled: ColumnModel of every row, used for categories with few rows.
+    """
+
+    def __init__(self, source, min_rows=20):
+        """
+        Learn distributions from raw YouTube data.
+        :param source: DataFrame of raw YouTube data, as read by data_loader.read_csv.
+        :param min_rows: Categories with fewer rows use the distribution of every row.
+        """
+        year = source['created_year']
+        data = source[year.notnull() & (year != 1970)]
+        counts = data['category'].value_counts()
+        self.categories = counts.index.to_numpy(dtype=object)
+        self.weights = counts.to_numpy() / counts.sum()
+        self.pooled = ColumnModel(data)
+        self.models = {category: ColumnModel(group)
+                       for category, group in data.groupby('category', observed=True)
+                       if len(group) >= min_rows}
+
+    @classmethod
+    def from_csv(cls, path=DATA_FILE, min_rows=20):
+        """
+        Learn distributions from a csv file.
+        :param path: Path of the csv file.
+        :param min_rows: Categories with fewer rows use the distribution of every row.
+        :return: SyntheticDataGenerator object.
+        """
+        return cls(read_csv(path), min_rows)
+
+    def generate(self, rows, chunk_size=100000, seed=0, dirt=0.0):
+        """
+        Generate rows one chunk at a time.
+        :param rows: Total number of rows.
+        :param chunk_size: Number of rows of each chunk.
+        :param seed: Seed of the random numbers, the same seed and chunk size give the same rows.
+        :param dirt: Share of rows with each kind of dirt clean_data removes or fixes:
+                     missing category, missing or 1970 created_year and non-letter names.
+        :return: Iterator of DataFrames with the columns of the csv file.
+        """
+        rng = np.random.default_rng(seed)
+        # enough letters to give every row its own name
+        width = max(1, math.ceil(math.log(max(rows, 2), 26)))
+        for start in range(0, rows, chunk_size):
+            yield self.chunk(start, min(chunk_size, rows - start), width, rng, dirt)
+
+    def chunk(self, start, rows, width, rng, dirt):
+        """
+        Generate one chunk of rows.
+        :param start: Number of the first row, used for its name.
+        :param rows: Number of rows.
+        :param width: Number of letters of the numbering part of names.
+        :param rng: NumPy random generator.
+        :param dirt: Share of rows with each kind of dirt.
+        :return: DataFrame with the columns of the csv file.
+        """
+        codes = rng.choice(len(self.categories), size=rows, p=self.weights)
+        columns = {column: np.empty(rows) for column in COPULA_COLUMNS}
+        columns['highest_monthly_earnings'] = np.empty(rows)
+        for code in np.unique(codes):
+            positions = np.flatnonzero(codes == code)
+            model = self.models.get(self.categories[code], self.pooled)
+            for column, values in model.sample(len(positions), rng).items():
+                columns[column][positions] = values
+
+        category = self.categories[codes]
+        names = self.names(np.arange(start, start + rows), width)
+        if dirt > 0:
+            category[rng.random(rows) < dirt] = np.nan
+            bad_year = rng.random(rows) < dirt
+            columns['created_year'][bad_year] = np.where(rng.random(bad_year.sum()) < 0.5,
+                                                         np.nan, 1970)
+            dirty = np.flatnonzero(rng.random(rows) < dirt)
+            parts = DIRTY_NAME_PARTS[rng.integers(len(DIRTY_NAME_PARTS), size=dirty.size)]
+            names[dirty] = np.char.add(names[dirty].astype(str), parts)
+
+        frame = pd.DataFrame({
+            'Youtuber': names,
+            'subscribers': np.round(columns['subscribers']).astype(np.int64),
+            'video views': np.round(columns['video views']),
+            'category': category,
+            'uploads': np.round(columns['uploads']).astype(np.int32),
+            'lowest_monthly_earnings': np.round(columns['lowest_monthly_earnings'], 2),
+            'highest_monthly_earnings': np.round(columns['highest_monthly_earnings'], 2),
+            'created_year': columns['created_year']})
+        return frame[USE_COLUMNS]
+
+    @staticmethod
+    def names(numbers, width):
+        """
+        Make names that have only letters, so cleaning keeps them different.
+        :param numbers: Array of row numbers.
+        :param width: Number of letters of the numbering part.
+        :return: Object array of names.
+        """
+        letters = np.empty((len(numbers), width), dtype=np.uint8)
+        rest = numbers.copy()
+        for i in range(width - 1, -1, -1):
+            letters[:, i] = ord('a') + rest % 26
+            rest //= 26
+        suffix = letters.view(f'S{width}').ravel().astype(f'U{width}')
+        return np.char.add('Channel', suffix).astype(object)
+
+
+def write_csv(chunks, path):
+    """
+    Write chunks to a csv file that data_loader can read.
+    :param chunks: Iterator of DataFrames.
+    :param path: Path of the csv file.
+    :return: Number of rows written.
+    """
+    rows = 0
+    with open(path, 'w', encoding='latin-1', newline='') as f:
+        for chunk in chunks:
+            chunk.to_csv(f, header=rows == 0, index=False)
+            rows += len(chunk)
+    return rows
+
+
+def write_parquet(chunks, path):
+    """
+    Write chunks to a Parquet file, one row group for each chunk.
+    :param chunks: Iterator of DataFrames.
+    :param path: Path of the Parquet file.
+    :return: Number of rows written.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError('Writing Parquet needs pyarrow, install it with: pip install pyarrow')
+    rows = 0
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                schema = table.schema.set(table.schema.get_field_index('category'),
+                                          pa.field('category', pa.string()))
+                writer = pq.ParquetWriter(path, schema)
+            writer.write_table(table.cast(writer.schema))
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def main(argv=None):
+    """
+    Write a synthetic dataset.
+    :param argv: Command line arguments, or None to use sys.argv.
+    :return: None
+    """
+    parser = argparse.ArgumentParser(description='Generate synthetic Global YouTube Statistics data')
+    parser.add_argument('rows', type=int, help='number of rows')
+    parser.add_argument('output', help='path of the .csv or .parquet file to write')
+    parser.add_argument('--source', default=DATA_FILE,
+                        help='csv file to learn distributions from')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the random numbers')
+    parser.add_argument('--chunk-size', type=int, default=100000,
+                        help='rows kept in memory at a time')
+    parser.add_argument('--dirt', type=float, default=0.0,
+                        help='share of rows with each kind of dirt clean_data handles')
+    args = parser.parse_args(argv)
+
+    generator = SyntheticDataGenerator.from_csv(args.source)
+    chunks = generator.generate(args.rows, args.chunk_size, args.seed, args.dirt)
+    if os.path.splitext(args.output)[1].lower() == '.parquet':
+        rows = write_parquet(chunks, args.output)
+    else:
+        rows = write_csv(chunks, args.output)
+    print(f'{rows} rows written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
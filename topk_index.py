@@ -0,0 +1,110 @@
+import pandas as pd
+
+TOP_COLUMNS = ['subscribers', 'video views', 'average_monthly_earnings']
+
+
+class TopKIndex:
+    """
+        The channels with the largest values of each column for each category.
+        Appending rows only ranks the new rows against the kept channels,
+        so looking up the top channels does not sort the whole data.
+
+        Attributes:
+            k: Number of channels kept for each category and column.
+            columns: Names of the columns channels are ranked by.
+            frames: Dict of column to DataFrame of the top channels of every category.
+    """
+
+    def __init__(self, k=10, columns=TOP_COLUMNS):
+        """
+        Initialize an empty TopKIndex object.
+        :param k: Number of channels kept for each category and column.
+        :param columns: Names of the columns channels are ranked by.
+        """
+        self.k = k
+        self.columns = list(columns)
+        self.frames = {}
+        self._lookup = {}
+
+    def update(self, rows):
+        """
+        Add rows to the index.
+        :param rows: DataFrame of cleaned YouTube data with average monthly earning.
+        :return: None
+        """
+        if rows.empty:
+            return
+        for column in self.columns:
+            self.add_top(column, self.top_of(rows, column))
+
+    def merge(self, other):
+        """
+        Add the top channels of another index, for example of another chunk.
+        :param other: The TopKIndex to merge.
+        :return: None
+        """
+        for column, frame in other.frames.items():
+            self.add_top(column, frame)
+
+    def replace_categories(self, rows, categories):
+        """
+        Rebuild the top channels of some categories, for example after rows of
+        those categories are removed.
+        :param rows: DataFrame of every row of the categories.
+        :param categories: The categories to rebuild.
+        :return: None
+        """
+        for column, frame in self.frames.items():
+            self.frames[column] = frame[~frame['category'].isin(categories)]
+            self._lookup.pop(column, None)
+        self.update(rows)
+
+    def copy(self):
+        """
+        Copy the index, so the copy can be updated while the original is read.
+        :return: New TopKIndex object.
+        """
+        result = TopKIndex(self.k, self.columns)
+        # frames are replaced when channels are added, never changed
+        result.frames = dict(self.frames)
+        return result
+
+    def add_top(self, column, candidates):
+        """
+        Rank candidate channels against the kept channels of a column.
+        :param column: The column to rank channels by.
+        :param candidates: DataFrame of the top channels of each category of new rows.
+        :return: None
+        """
+        if column in self.frames:
+            candidates = self.top_of(pd.concat([self.frames[column], candidates],
+                                               ignore_index=True), column)
+        self.frames[column] = candidates
+        self._lookup.pop(column, None)
+
+    def top_of(self, rows, column):
+        """
+        Find the top channels of each category in the rows.
+        :param rows: DataFrame of YouTube data.
+        :param column: The column to rank channels by.
+        :return: DataFrame of at most k channels for each category, sorted descending.
+        """
+        ranked = rows.sort_values(column, ascending=False, kind='stable')
+        return ranked.groupby('category', observed=True, sort=False).head(self.k)
+
+    def get(self, category, column, k=None):
+        """
+        Get the top channels of a category.
+        :param category: The category of channels.
+        :param column: The column to rank channels by.
+        :param k: Number of channels, at most the k of the index.
+        :return: DataFrame of channels, sorted descending.
+        """
+        if column not in self.frames:
+            return pd.DataFrame(columns=['Youtuber', 'category', column])
+        if column not in self._lookup:
+            frame = self.frames[column]
+            self._lookup[column] = {name: group for name, group in
+                                    frame.groupby('category', observed=True, sort=False)}
+        empty = self.frames[column].iloc[0:0]
+        return self._lookup[column].get(category, empty).head(k or self.k)
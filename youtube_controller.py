@@ -1,25 +1,167 @@
+import time
 import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
 from youtube_view import YouTubeView
-from data_manage import StoryTelling
+from cross_filter import CrossFilter
+from render_cache import RenderCache
+from render_pipeline import RenderPipeline
+from prefetch import Prefetcher, neighbour_order
+from perf_monitor import LatencyRecorder, timed
+
+# milliseconds between checking whether the csv file is changed
+WATCH_MS = 2000
+
+# graphs whose neighbouring options are prefetched, and the view attribute of the combobox they are selected with
+PREFETCH_OPTIONS = {
+    'create_pie': 'select_pie_att',
+    'create_suggest_bar_sub': 'select_suggest_att',
+    'create_suggest_bar_view': 'select_suggest_att',
+}
 
 
 class YouTubeController:
     """
     The controller object for managing the GUI application.
     """
-    def __init__(self):
+    def __init__(self, streaming=False, perf_log=None, lazy=False, started=None, watch=False,
+                 compact=False, store=None, snapshot=None):
         """
         Initialize the YouTubeController.
-        """
-        self.story = StoryTelling(self)
+        :param streaming: If True, read the dataset in chunks and keep only aggregates
+                          and a sample of rows in memory.
+        :param perf_log: Path of a JSON lines file to append timings to on exit,
+                         or None to record timings only while the overlay is shown.
+        :param lazy: If True, show the home page first, load the data in a background
+                     thread and create the other pages when they are first needed.
+        :param started: perf_counter() time the program started, used to measure startup.
+        :param watch: If True, apply changes of the csv file to the data while running.
+                      This is not supported in streaming mode.
+        :param compact: If True, keep the data in smaller dtypes to use less memory.
+        :param store: Directory of a ColumnStore to open snapshots of instead of the csv file.
+        :param snapshot: Name of the snapshot to open first, or None for the latest one.
+        """
+        self.started = started if started is not None else time.perf_counter()
+        self.perf = LatencyRecorder(enabled=perf_log is not None)
+        self.perf_log = perf_log
+        self.streaming = streaming
+        self.compact = compact
+        self.store_path = store
+        self.first_snapshot = snapshot
+        self.data_filter = CrossFilter()
+        self.pages = set()
+        self.shown = {}
+        self.watcher = None
+        self._watch_executor = None
+        self._watch_job = None
+        self._story = None
+        self._loading = None
+        if not lazy:
+            self._story = self.load_story()
+        self.render_cache = RenderCache()
         self.view = YouTubeView(self)
+        self.pipeline = RenderPipeline(self.view, recorder=self.perf)
+        self.prefetcher = Prefetcher(self)
         self.scatter_attribute_1 = None
         self.scatter_attribute_2 = None
         self.bind_button()
+        if lazy:
+            executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='startup')
+            self._loading = executor.submit(self.load_story)
+            executor.shutdown(wait=False)
+            self.view.after(100, self.poll_loading)
+        else:
+            for page in ['story', 'create', 'suggest']:
+                self.ensure_page(page)
+            self.bind_snapshot_selector()
+            self.bind_filter_panel()
+        self.view.after_idle(self.record_startup, 'first_window')
+        if watch:
+            self.start_watch()
+
+    @property
+    def story(self):
+        """
+        The StoryTelling object. In lazy mode this waits for the data to be loaded.
+        """
+        if self._story is None:
+            self.view.configure(cursor='watch')
+            self.view.update_idletasks()
+            self._story = self._loading.result()
+            self.view.configure(cursor='')
+        return self._story
+
+    def load_story(self):
+        """
+        Import the data modules and load the data. In lazy mode this runs in a
+        background thread, so pandas and seaborn are not imported before the
+        first window is shown.
+        :return: The StoryTelling object.
+        """
+        from data_manage import StoryTelling
+        store = None
+        if self.store_path is not None:
+            from column_store import ColumnStore
+            store = ColumnStore(self.store_path)
+        story = StoryTelling(self, self.streaming, self.compact, store, self.first_snapshot)
+        self.record_startup('data_ready')
+        return story
+
+    def poll_loading(self):
+        """
+        Check whether the data is loaded, then create the other pages one at a
+        time while the application is idle.
+        :return: None
+        """
+        if not self._loading.done():
+            self.view.after(100, self.poll_loading)
+            return
+        if self._story is None:
+            self._story = self._loading.result()
+        self.bind_snapshot_selector()
+        self.bind_filter_panel()
+        self.build_pages_when_idle(['story', 'create', 'suggest'])
+
+    def build_pages_when_idle(self, pages):
+        """
+        Create pages one at a time, so clicks are handled between them.
+        :param pages: Names of the pages to create.
+        :return: None
+        """
+        if not pages:
+            return
+        self.ensure_page(pages[0])
+        self.view.after(50, self.build_pages_when_idle, pages[1:])
+
+    def record_startup(self, phase):
+        """
+        Record the time since the program started.
+        :param phase: 'first_window' or 'data_ready'.
+        :return: None
+        """
+        self.perf.record('startup', phase, time.perf_counter() - self.started)
+
+    def ensure_page(self, page):
+        """
+        Create a page and bind its widgets, unless it is created already.
+        :param page: 'story', 'create' or 'suggest'.
+        :return: None
+        """
+        if page in self.pages:
+            return
+        if page == 'story':
+            self.view.create_story_page()
+            self.bind_story_page()
+        elif page == 'create':
+            self.view.create_menu_graph_page()
+            self.bind_create_page()
+        elif page == 'suggest':
+            self.view.create_suggest_page()
+            self.bind_suggest_page()
+        self.pages.add(page)
 
     def bind_button(self):
         """
-        Bind various buttons and combobox to their respective event handlers.
+        Bind menu buttons to their respective event handlers.
         :return: None
         """
         self.view.home_button.bind('<Button-1>', lambda event: self.handle_menu(2))
@@ -27,26 +169,130 @@ class YouTubeController:
         self.view.create_button.bind('<Button-1>', lambda event: self.handle_menu(5))
         self.view.suggest_button.bind('<Button-1>', lambda event: self.handle_menu(3))
 
+        self.view.bind_all('<F12>', lambda event: self.toggle_perf_overlay())
+        self.view.bind_all('<ButtonPress>', self.prefetcher.pause, add='+')
+        self.view.bind_all('<KeyPress>', self.prefetcher.pause, add='+')
+
+    def bind_story_page(self):
+        """
+        Bind buttons of 'story telling' menu to their event handlers.
+        :return: None
+        """
         self.view.corr_button.bind('<Button-1>', lambda event: self.handle_story_page(1))
         self.view.year_trend_button.bind('<Button-1>', lambda event: self.handle_story_page(2))
         self.view.avg_earning_button.bind('<Button-1>', lambda event: self.handle_story_page(3))
         self.view.descriptive_button.bind('<Button-1>', lambda event: self.handle_story_page(4))
 
+    def bind_create_page(self):
+        """
+        Bind buttons and combobox of 'create graph' menu to their event handlers.
+        :return: None
+        """
         self.view.hist_button.bind('<Button-1>', lambda event: self.handle_create_graph(1))
         self.view.scatter_button.bind('<Button-1>', lambda event: self.handle_create_graph(2))
         self.view.pie_button.bind('<Button-1>', lambda event: self.handle_create_graph(3))
         self.view.bar_button.bind('<Button-1>', lambda event: self.handle_create_graph(4))
 
         self.view.select_hist_att.bind('<<ComboboxSelected>>', self.handle_create_hist)
+        self.view.hist_bins.configure(command=lambda: self.handle_create_hist(None))
+        self.view.hist_log_button.configure(command=lambda: self.handle_create_hist(None))
         self.view.select_scatter_att_1.bind('<<ComboboxSelected>>', self.handle_create_scatter)
         self.view.select_scatter_att_2.bind('<<ComboboxSelected>>', self.handle_create_scatter)
         self.view.select_pie_att.bind('<<ComboboxSelected>>', self.handle_create_pie)
         self.view.select_bar_att.bind('<<ComboboxSelected>>', self.handle_create_bar)
 
+    def bind_suggest_page(self):
+        """
+        Bind buttons and combobox of 'suggest channel' menu to their event handlers.
+        :return: None
+        """
         self.view.select_suggest_att.bind('<<ComboboxSelected>>', self.handle_suggest_graph)
         self.view.from_sub.bind('<Button-1>', lambda event: self.handle_suggest_graph(1))
         self.view.from_view.bind('<Button-1>', lambda event: self.handle_suggest_graph(2))
 
+    def bind_snapshot_selector(self):
+        """
+        Create the combobox for switching snapshots and bind it, if the data is
+        opened from a store with more than one snapshot.
+        :return: None
+        """
+        if self.story.store is None or len(self.story.store.snapshots) < 2:
+            return
+        self.view.create_snapshot_selector(self.story.store.names(), self.story.snapshot)
+        self.view.select_snapshot.bind('<<ComboboxSelected>>', self.handle_snapshot)
+
+    @timed
+    def handle_snapshot(self, event):
+        """
+        Handle switching to the snapshot selected in the combobox.
+        :return: None
+        """
+        name = self.view.select_snapshot.get()
+        if name != self.story.snapshot:
+            self.story.open_snapshot(self.story.store, name)
+            self.refresh_after_update()
+
+    def bind_filter_panel(self):
+        """
+        Create the widgets for filtering every graph and the descriptive table,
+        and bind them.
+        :return: None
+        """
+        years = [str(int(year)) for year in self.story.row_index('created_year').values]
+        self.view.create_filter_panel(self.get_unique_category(), years)
+        self.view.filter_apply.bind('<Button-1>', self.handle_filter)
+        self.view.filter_clear.bind('<Button-1>', self.handle_clear_filter)
+
+    def read_filter(self):
+        """
+        Create a filter from the widgets of the filter panel.
+        :return: CrossFilter object.
+        """
+        selected = self.view.filter_categories.curselection()
+        categories = [self.view.filter_categories.get(i) for i in selected] or None
+        years = [int(text) if text else None for text in
+                 (self.view.filter_year_from.get(), self.view.filter_year_to.get())]
+        subscribers = [float(text) * 1e6 if text.strip() else None for text in
+                       (self.view.filter_sub_from.get(), self.view.filter_sub_to.get())]
+        return CrossFilter(categories, years, subscribers)
+
+    @timed
+    def handle_filter(self, event):
+        """
+        Handle applying the filter of the filter panel to every graph and the table.
+        :return: None
+        """
+        try:
+            data_filter = self.read_filter()
+        except ValueError as error:
+            self.view.show_filter_status(f'Invalid filter: {error}')
+            return
+        self.set_filter(data_filter)
+
+    @timed
+    def handle_clear_filter(self, event):
+        """
+        Handle clearing the filter panel, so every channel is shown again.
+        :return: None
+        """
+        self.view.clear_filter_panel()
+        self.set_filter(CrossFilter())
+
+    def set_filter(self, data_filter):
+        """
+        Show only the channels the filter keeps in every graph and the descriptive
+        table, and create the displayed graphs again. Graphs and aggregates are
+        cached for each filter, so going back to a filter is instant.
+        :param data_filter: CrossFilter object.
+        :return: None
+        """
+        self.data_filter = data_filter
+        self.story.set_filter(data_filter)
+        self.view.show_filter_status(f'{data_filter.describe()}: '
+                                     f'{len(self.story.filtered_data)} channels')
+        self.refresh_after_update()
+
+    @timed
     def handle_menu(self, num):
         """
         Handle displays the menu based on the user-selected option.
@@ -54,13 +300,16 @@ class YouTubeController:
         :return: None
         """
         if num == 1:
+            self.ensure_page('story')
             self.view.story_canvas.pack(side=tk.TOP, anchor='w', fill=tk.BOTH, expand=True)
             self.story_and_default()
         elif num == 2:
             self.view.show_home_page()
         elif num == 3:
+            self.ensure_page('suggest')
             self.suggest_and_default()
         elif num == 5:
+            self.ensure_page('create')
             self.create_and_default(num)
 
     def story_and_default(self):
@@ -70,7 +319,7 @@ class YouTubeController:
         """
         self.view.table_frame.pack_forget()
         self.view.show_story_page()
-        self.story.default_story_graph()
+        self.render(self.view.story_canvas, self.story.default_story_graph)
 
     def create_and_default(self, num):
         """
@@ -78,7 +327,8 @@ class YouTubeController:
         :param num: The number represent type of graph that user selected.
         :return: None
         """
-        self.story.create_histogram('subscribers')
+        self.render(self.view.create_graph_canvas, self.story.create_histogram, 'subscribers',
+                    *self.read_hist_options())
         self.view.show_create_graph_page(num, event=None)
 
     def suggest_and_default(self):
@@ -86,7 +336,7 @@ class YouTubeController:
         Handle display 'suggest channel' menu with default graph.
         :return: None
         """
-        self.story.create_suggest_bar_sub('Music')
+        self.render(self.view.suggest_canvas, self.story.create_suggest_bar_sub, 'Music')
         self.view.show_suggest_page()
 
     def show_first_graph(self):
@@ -94,22 +344,23 @@ class YouTubeController:
         Create first graph of story telling.
         :return: None
         """
-        self.story.first_story(event=None)
+        self.render(self.view.story_canvas, self.story.first_story, None)
 
     def show_second_graph(self):
         """
         Create second graph of story telling.
         :return: None
         """
-        self.story.second_story(event=None)
+        self.render(self.view.story_canvas, self.story.second_story, None)
 
     def show_third_graph(self):
         """
         Create third graph of story telling.
         :return: None
         """
-        self.story.third_story(event=None)
+        self.render(self.view.story_canvas, self.story.third_story, None)
 
+    @timed
     def handle_story_page(self, num):
         """
         Handle display story pages based on the provided number.
@@ -132,13 +383,96 @@ class YouTubeController:
             self.view.story_canvas.pack_forget()
             self.view.show_table()
 
+    def render(self, canvas, method, *args):
+        """
+        Display a graph on the canvas from the render cache or the prefetched
+        graphs, or create it with the StoryTelling method in the render pipeline
+        when it is not cached. The graphs of the neighbouring options are then
+        prefetched while the application is idle.
+        :param canvas: The canvas that will display graph.
+        :param method: The StoryTelling method that creates the graph.
+        :param args: Arguments of the method.
+        :return: None
+        """
+        self.prefetcher.cancel()
+        self.shown[canvas] = (method, args)
+        size = self.view.graph_size(canvas)
+        # the worker uses the data and the filter of the key, whatever is set meanwhile
+        method = self.story.pin(method)
+        key = RenderCache.make_key(method.__name__, args, self.story.view_version, size)
+        image = self.render_cache.get(key)
+        phase = 'cached'
+        if image is None:
+            image = self.prefetcher.take(key)
+            phase = 'prefetched'
+            if image is not None:
+                self.render_cache.put(key, image)
+        if image is not None:
+            self.pipeline.cancel(canvas)
+            self.view.hide_busy(canvas)
+            with self.perf.measure(method.__name__, phase):
+                self.view.display_bitmap(image, canvas)
+        else:
+            self.view.show_busy(canvas)
+            self.pipeline.submit(canvas, method, args, size,
+                                 lambda job, rendered: self.finish_render(key, job, rendered))
+        self.prefetch_neighbours(method, args, size)
+
+    def prefetch_neighbours(self, method, args, size):
+        """
+        Prefetch the graphs of the options next to the selected one in the
+        combobox the graph is selected with.
+        :param method: The StoryTelling method that creates the graph, pinned to the
+                       current state with StoryTelling.pin.
+        :param args: Arguments of the method.
+        :param size: (width, height) in pixels of the graph.
+        :return: None
+        """
+        attribute = PREFETCH_OPTIONS.get(method.__name__)
+        if attribute is None or len(args) != 1:
+            return
+        options = getattr(self.view, attribute)['values']
+        neighbours = neighbour_order(options, args[0], self.prefetcher.radius)
+        self.prefetcher.schedule(method, [(option,) for option in neighbours], size,
+                                 self.story.view_version)
+
+    def finish_render(self, key, job, image):
+        """
+        Cache and display a graph created by the render pipeline.
+        :param key: The render cache key of the graph.
+        :param job: The finished RenderJob.
+        :param image: RGBA array of the graph, or None if it is not created.
+        :return: None
+        """
+        self.view.hide_busy(job.target)
+        if image is None:
+            return
+        self.render_cache.put(key, image)
+        with self.perf.measure(job.name, 'display'):
+            self.view.display_bitmap(image, job.target)
+        self.perf.record(job.name, 'total', time.perf_counter() - job.submitted)
+
+    def present(self, fig, canvas):
+        """
+        Hand the graph to the render job that is creating it, or display it
+        directly when it is created outside the render pipeline.
+        :param fig: The matplotlib figure object.
+        :param canvas: The canvas that will display graph.
+        :return: None
+        """
+        job = self.pipeline.current_job()
+        if job is not None:
+            job.figure = fig
+            return
+        self.view.display_graph(fig, canvas)
+
     def show_graph(self, fig):
         """
         Handle display graph in 'story telling' menu.
         :param fig: The matplotlib figure object.
         :return: None
         """
-        self.view.display_graph(fig, self.view.story_canvas)
+        self.present(fig, self.view.story_canvas)
 
     def show_create_graph(self, fig):
         """
@@ -146,7 +480,7 @@ class YouTubeController:
         :param fig: The matplotlib figure object.
         :return: None
         """
-        self.view.display_graph(fig, self.view.create_graph_canvas)
+        self.present(fig, self.view.create_graph_canvas)
 
     def show_suggest_graph(self, fig):
         """
@@ -154,7 +488,7 @@ class YouTubeController:
         :param fig: The matplotlib figure object.
         :return: None
         """
-        self.view.display_graph(fig, self.view.suggest_canvas)
+        self.present(fig, self.view.suggest_canvas)
 
     def get_data(self):
         """
@@ -163,42 +497,146 @@ class YouTubeController:
         """
         return self.story.youtube_data
 
+    def get_summary(self):
+        """
+        Get descriptive statistics of the numeric columns.
+        :return: DataFrame with 'count', 'mean', 'std', 'min', '25%', '50%', '75%'
+                 and 'max' rows.
+        """
+        return self.story.stats.describe()
+
+    def append_rows(self, rows):
+        """
+        Append raw rows to the data and refresh the descriptive table in place.
+        Graphs are created again on next display, since the data version changes.
+        :param rows: DataFrame of raw YouTube data.
+        :return: None
+        """
+        self.story.append_rows(rows)
+        self.refresh_after_update()
+
+    def refresh_after_update(self):
+        """
+        Refresh the descriptive table in place and create the displayed graphs
+        again from the changed data or filter.
+        :return: None
+        """
+        if 'story' in self.pages:
+            self.view.refresh_table()
+        for canvas, (method, args) in list(self.shown.items()):
+            if canvas.winfo_ismapped():
+                self.render(canvas, method, *args)
+
+    def start_watch(self):
+        """
+        Start watching the csv file. The first snapshot of the file is taken in
+        a background thread, then the file is checked every WATCH_MS milliseconds.
+        :return: None
+        """
+        self._watch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='watch')
+        self._watch_job = self._watch_executor.submit(self.load_watcher)
+        self.view.after(WATCH_MS, self.poll_watch)
+
+    def load_watcher(self):
+        """
+        Create the watcher and take the first snapshot of the file. This runs in
+        a background thread, so pandas is not imported before the first window.
+        :return: The DatasetWatcher.
+        """
+        from data_loader import DATA_FILE
+        from file_watch import DatasetWatcher
+        watcher = DatasetWatcher(DATA_FILE)
+        watcher.snapshot = watcher.take_snapshot()
+        return watcher
+
+    def poll_watch(self):
+        """
+        Apply a finished snapshot or delta, or start reading the file in a background
+        thread when it is changed. If the first snapshot can not be taken, the error
+        is reported once and the file is not watched anymore.
+        :return: None
+        """
+        stop = False
+        try:
+            job = self._watch_job
+            if job is not None and job.done():
+                self._watch_job = None
+                error = job.exception()
+                if error is not None:
+                    # without a first snapshot there is nothing to compare the file with
+                    stop = self.watcher is None
+                    self.view.report_callback_exception(type(error), error, error.__traceback__)
+                    return
+                result = job.result()
+                if self.watcher is None:
+                    self.watcher = result
+                elif not result.is_empty():
+                    with self.perf.measure('reload', 'apply'):
+                        self.watcher.apply(result, self.story)
+                    self.refresh_after_update()
+                else:
+                    self.watcher.snapshot = result.snapshot
+            elif job is None and self.watcher is not None and self.watcher.changed():
+                self._watch_job = self._watch_executor.submit(self.watcher.compute_delta)
+        finally:
+            if stop:
+                self._watch_executor.shutdown(wait=False)
+            else:
+                self.view.after(WATCH_MS, self.poll_watch)
+
     def get_unique_category(self):
         """
         Get unique category from dataset.
         :return: None
         """
-        unique_category = list(self.story.youtube_data['category'].unique())
+        unique_category = self.story.all_categories()
         return unique_category
 
+    @timed
     def handle_create_graph(self, num):
         """
         Handle display create graph base on the provide number.
         :param num: The number represent type of graph that user select.
         :return: None
         """
+        canvas = self.view.create_graph_canvas
         if num == 1:
-            self.story.create_histogram('subscribers')
+            self.render(canvas, self.story.create_histogram, 'subscribers',
+                        *self.read_hist_options())
         elif num == 2:
-            self.story.create_scatter('subscribers', 'video views')
+            self.render(canvas, self.story.create_scatter, 'subscribers', 'video views')
         elif num == 3:
-            self.story.create_pie('2005')
+            self.render(canvas, self.story.create_pie, '2005')
         elif num == 4:
-            self.story.create_bar('subscribers')
+            self.render(canvas, self.story.create_bar, 'subscribers')
         self.view.show_create_graph_page(num, event=None)
 
+    def read_hist_options(self):
+        """
+        Read the number of bins and the scale of histograms from their widgets.
+        :return: (bins, scale), bins is None for 'auto'.
+        """
+        bins = self.view.hist_bins.get()
+        bins = None if bins == 'auto' else int(bins)
+        scale = 'log' if self.view.hist_log.get() else 'linear'
+        return bins, scale
+
+    @timed
     def handle_create_hist(self, event):
         """
-        Handle create histogram based on selected attribute.
+        Handle create histogram based on selected attribute, number of bins and scale.
         :return: None
         """
         attribute = self.view.select_hist_att.get()
+        bins, scale = self.read_hist_options()
+        canvas = self.view.create_graph_canvas
         if attribute == 'Subscribers':
-            self.story.create_histogram('subscribers')
+            self.render(canvas, self.story.create_histogram, 'subscribers', bins, scale)
         elif attribute == 'Video views':
-            self.story.create_histogram('video views')
+            self.render(canvas, self.story.create_histogram, 'video views', bins, scale)
         elif attribute == 'Average monthly earnings':
-            self.story.create_histogram('average_monthly_earnings')
+            self.render(canvas, self.story.create_histogram, 'average_monthly_earnings',
+                        bins, scale)
 
     def handle_scatter_att_1(self):
         """
@@ -230,6 +668,7 @@ class YouTubeController:
         if attribute_2 == 'Average monthly earnings':
             return 'average_monthly_earnings'
 
+    @timed
     def handle_create_scatter(self, event):
         """
         Handle create scatter graph based on selected attribute.
@@ -239,31 +678,36 @@ class YouTubeController:
         self.scatter_attribute_2 = self.handle_scatter_att_2()
         if (self.scatter_attribute_1 is not None and self.scatter_attribute_2 is not None
                 and self.view.select_scatter_att_1.get() and self.view.select_scatter_att_2.get()):
-            self.story.create_scatter(self.scatter_attribute_1, self.scatter_attribute_2)
+            self.render(self.view.create_graph_canvas, self.story.create_scatter,
+                        self.scatter_attribute_1, self.scatter_attribute_2)
 
+    @timed
     def handle_create_pie(self, event):
         """
         Handle create pie chart based on selected attribute.
         :return: None
         """
         year = self.view.select_pie_att.get()
-        self.story.create_pie(year)
+        self.render(self.view.create_graph_canvas, self.story.create_pie, year)
 
+    @timed
     def handle_create_bar(self, event):
         """
         Handle create bar graph based on selected attribute.
         :return: None
         """
         attribute = self.view.select_bar_att.get()
+        canvas = self.view.create_graph_canvas
         if attribute == 'Subscribers':
-            self.story.create_bar('subscribers')
+            self.render(canvas, self.story.create_bar, 'subscribers')
         elif attribute == 'Video views':
-            self.story.create_bar('video views')
+            self.render(canvas, self.story.create_bar, 'video views')
         elif attribute == 'Uploaded videos':
-            self.story.create_bar('uploads')
+            self.render(canvas, self.story.create_bar, 'uploads')
         elif attribute == 'Average monthly earnings':
-            self.story.create_bar('average_monthly_earnings')
+            self.render(canvas, self.story.create_bar, 'average_monthly_earnings')
 
+    @timed
     def handle_suggest_graph(self, num):
         """
         Handle 'suggest channel' menu.
@@ -272,9 +716,39 @@ class YouTubeController:
         """
         category = self.view.select_suggest_att.get()
         if category is not None and num == 1:
-            self.story.create_suggest_bar_sub(category)
+            self.render(self.view.suggest_canvas, self.story.create_suggest_bar_sub, category)
         if category is not None and num == 2:
-            self.story.create_suggest_bar_view(category)
+            self.render(self.view.suggest_canvas, self.story.create_suggest_bar_view, category)
+
+    def toggle_perf_overlay(self):
+        """
+        Show or hide the overlay of handler and graph timings. Timings are
+        recorded while the overlay is shown.
+        :return: None
+        """
+        if self.view.perf_overlay_shown():
+            self.view.hide_perf_overlay()
+            self.perf.enabled = self.perf_log is not None
+        else:
+            self.perf.enabled = True
+            self.refresh_perf_overlay()
+
+    def refresh_perf_overlay(self):
+        """
+        Update the overlay with p50 and p95 of the latest timings every half second
+        while it is shown.
+        :return: None
+        """
+        self.view.show_perf_overlay(self.perf.format_summary())
+        self.view.after(500, self.refresh_perf_overlay_if_shown)
+
+    def refresh_perf_overlay_if_shown(self):
+        """
+        Update the overlay unless it is hidden.
+        :return: None
+        """
+        if self.view.perf_overlay_shown():
+            self.refresh_perf_overlay()
 
     def run(self):
         """
@@ -282,4 +756,9 @@ class YouTubeController:
         :return: None
         """
         self.view.mainloop()
+        self.pipeline.shutdown()
+        if self._watch_executor is not None:
+            self._watch_executor.shutdown(wait=False, cancel_futures=True)
+        if self.perf_log is not None:
+            self.perf.export_jsonl(self.perf_log)
 
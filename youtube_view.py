@@ -1,7 +1,6 @@
 import tkinter as tk
 from tkinter import ttk, Frame
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from render_cache import figure_to_rgba
 
 
 class YouTubeView(tk.Tk):
@@ -17,7 +16,11 @@ class YouTubeView(tk.Tk):
         self.title('YouTube Trend Analysis')
         self.configure(bg='#f8f6f2')
         self.controller = controller
-        self.canvas = None
+        self.graph_displays = {}
+        self.busy_labels = {}
+        self.perf_overlay = None
+        self.select_snapshot = None
+        self.filter_status = None
         self.fig = None
         self.check_menu = None
         self.init_component()
@@ -25,8 +28,8 @@ class YouTubeView(tk.Tk):
     def init_component(self):
         """
         Set up the main component of 'YouTube Trend Analysis' application
-        and also create component of the home page,
-        story page, menu graph page, and suggest page .
+        and also create component of the home page. The story page, menu graph page
+        and suggest page are created by the controller when they are needed.
         :return: None
         """
         self.top_frame = Frame(self, bg='#f8f6f2', height=130, highlightbackground='#cd3c3c',
@@ -59,9 +62,83 @@ class YouTubeView(tk.Tk):
         self.show_menu = Frame(self, bg='#f8f6f2', width=900)
         self.create_home_page()
         self.show_home_page()
-        self.create_story_page()
-        self.create_menu_graph_page()
-        self.create_suggest_page()
+
+    def create_snapshot_selector(self, names, current):
+        """
+        Set up the combobox for selecting the snapshot of the data, below the menu buttons.
+        :param names: Names of the snapshots.
+        :param current: Name of the snapshot that is open.
+        :return: None
+        """
+        self.select_snapshot = ttk.Combobox(self.menu_page, state='readonly', width=14,
+                                            values=names)
+        self.select_snapshot.set(current)
+        self.select_snapshot.pack(side=tk.TOP, padx=10, pady=10)
+
+    def create_filter_panel(self, categories, years):
+        """
+        Set up the widgets for filtering the channels of every graph, below the menu buttons.
+        :param categories: Categories to choose from.
+        :param years: Created years to choose from, as text.
+        :return: None
+        """
+        self.filter_frame = tk.LabelFrame(self.menu_page, text='Filter', font=('BM Jua', 16),
+                                          fg='#cd3c3c', bg='#f1e8d7')
+        self.filter_frame.pack(side=tk.TOP, padx=10, pady=10, fill=tk.X)
+        self.filter_categories = tk.Listbox(self.filter_frame, selectmode=tk.MULTIPLE,
+                                            exportselection=False, height=6, width=18)
+        for category in categories:
+            self.filter_categories.insert(tk.END, category)
+        self.filter_categories.pack(side=tk.TOP, padx=5, pady=5)
+
+        year_frame = Frame(self.filter_frame, bg='#f1e8d7')
+        year_frame.pack(side=tk.TOP, padx=5, pady=2)
+        tk.Label(year_frame, text='Years', fg='#3d251e', bg='#f1e8d7').pack(side=tk.LEFT)
+        self.filter_year_from = ttk.Combobox(year_frame, state='readonly', width=5,
+                                             values=[''] + years)
+        self.filter_year_from.pack(side=tk.LEFT)
+        tk.Label(year_frame, text='to', fg='#3d251e', bg='#f1e8d7').pack(side=tk.LEFT)
+        self.filter_year_to = ttk.Combobox(year_frame, state='readonly', width=5,
+                                           values=[''] + years)
+        self.filter_year_to.pack(side=tk.LEFT)
+
+        sub_frame = Frame(self.filter_frame, bg='#f1e8d7')
+        sub_frame.pack(side=tk.TOP, padx=5, pady=2)
+        tk.Label(sub_frame, text='Subscribers (M)', fg='#3d251e', bg='#f1e8d7').pack(side=tk.LEFT)
+        self.filter_sub_from = tk.Entry(sub_frame, width=5)
+        self.filter_sub_from.pack(side=tk.LEFT)
+        tk.Label(sub_frame, text='to', fg='#3d251e', bg='#f1e8d7').pack(side=tk.LEFT)
+        self.filter_sub_to = tk.Entry(sub_frame, width=5)
+        self.filter_sub_to.pack(side=tk.LEFT)
+
+        button_frame = Frame(self.filter_frame, bg='#f1e8d7')
+        button_frame.pack(side=tk.TOP, padx=5, pady=5)
+        self.filter_apply = tk.Button(button_frame, text='Apply', fg='#cd3c3c', width=6)
+        self.filter_apply.pack(side=tk.LEFT, padx=5)
+        self.filter_clear = tk.Button(button_frame, text='Clear', fg='#cd3c3c', width=6)
+        self.filter_clear.pack(side=tk.LEFT, padx=5)
+        self.filter_status = tk.Label(self.filter_frame, text='All channels', fg='#3d251e',
+                                      bg='#f1e8d7', wraplength=180, justify=tk.LEFT)
+        self.filter_status.pack(side=tk.TOP, padx=5, pady=5)
+
+    def show_filter_status(self, text):
+        """
+        Show which channels the filter keeps, or why it is not applied.
+        :param text: The text to show.
+        :return: None
+        """
+        self.filter_status.configure(text=text)
+
+    def clear_filter_panel(self):
+        """
+        Reset the widgets of the filter panel to keep every channel.
+        :return: None
+        """
+        self.filter_categories.selection_clear(0, tk.END)
+        self.filter_year_from.set('')
+        self.filter_year_to.set('')
+        self.filter_sub_from.delete(0, tk.END)
+        self.filter_sub_to.delete(0, tk.END)
 
     def create_home_page(self):
         """
@@ -198,6 +275,17 @@ class YouTubeView(tk.Tk):
         self.select_hist_att['values'] = ['Subscribers', 'Video views', 'Average monthly earnings']
         self.select_hist_att.current(newindex=0)
         self.select_hist_att.pack(side=tk.LEFT, padx=5)
+        self.hist_bins_label = tk.Label(self.show_hist_frame, text='Bins', font=('BM Jua', 22),
+                                        fg='#cd3c3c', bg='#f1e8d7')
+        self.hist_bins_label.pack(side=tk.LEFT, padx=15, pady=15)
+        self.hist_bins = tk.Spinbox(self.show_hist_frame, state='readonly', width=5,
+                                    values=['auto'] + [str(bins) for bins in range(5, 205, 5)])
+        self.hist_bins.pack(side=tk.LEFT, padx=5)
+        self.hist_log = tk.BooleanVar(value=False)
+        self.hist_log_button = tk.Checkbutton(self.show_hist_frame, text='Log scale',
+                                              variable=self.hist_log, fg='#cd3c3c',
+                                              bg='#f8f6f2')
+        self.hist_log_button.pack(side=tk.LEFT, padx=5)
 
     def scatter_selected(self):
         """
@@ -395,14 +483,97 @@ class YouTubeView(tk.Tk):
         :param graph: The canvas that will display graph.
         :return: None
         """
-        if self.canvas:
-            self.canvas.get_tk_widget().destroy()
+        with self.controller.perf.measure('display_graph', 'rasterize'):
+            image = figure_to_rgba(fig, self.graph_size(graph))
+        with self.controller.perf.measure('display_graph', 'display'):
+            self.display_bitmap(image, graph)
+
+    def display_bitmap(self, image, graph):
+        """
+        Display a rendered image of a graph on the canvas.
+        :param image: RGBA array of the graph.
+        :param graph: The canvas that will display graph.
+        :return: None
+        """
+        self.graph_display(graph).show(image)
+
+    def graph_display(self, graph):
+        """
+        Get the long-lived display of the canvas, creating it on first use.
+        :param graph: The canvas that will display graph.
+        :return: The GraphDisplay of the canvas.
+        """
+        if graph not in self.graph_displays:
+            # matplotlib is imported when the first graph is displayed, not at startup
+            from graph_display import GraphDisplay
+            self.graph_displays[graph] = GraphDisplay(graph)
+        return self.graph_displays[graph]
+
+    def graph_size(self, graph):
+        """
+        Get size in pixels that graphs on the canvas should be rendered at.
+        :param graph: The canvas that will display graph.
+        :return: (width, height), or None if the canvas is not displayed yet.
+        """
+        widget = self.graph_display(graph).canvas.get_tk_widget()
+        widget.update_idletasks()
+        size = (widget.winfo_width(), widget.winfo_height())
+        if min(size) <= 1:
+            return None
+        return size
+
+    def show_busy(self, graph):
+        """
+        Display a busy indicator on the canvas while a graph is being created.
+        :param graph: The canvas that will display graph.
+        :return: None
+        """
+        if graph not in self.busy_labels:
+            self.busy_labels[graph] = tk.Label(graph, text='Creating graph...',
+                                               font=('BM Jua', 20), fg='#cd3c3c', bg='#f1e8d7')
+        self.busy_labels[graph].place(relx=0.5, rely=0.5, anchor='center')
+        self.busy_labels[graph].lift()
+        self.configure(cursor='watch')
 
-        self.canvas = FigureCanvasTkAgg(fig, master=graph)
-        self.canvas.draw()
-        self.canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=1)
+    def hide_busy(self, graph):
+        """
+        Remove the busy indicator from the canvas.
+        :param graph: The canvas that will display graph.
+        :return: None
+        """
+        if graph in self.busy_labels:
+            self.busy_labels[graph].place_forget()
+        if not any(label.winfo_manager() for label in self.busy_labels.values()):
+            self.configure(cursor='')
 
-        plt.close(fig)
+    def show_perf_overlay(self, text):
+        """
+        Display the debug overlay of timings in the top right corner of the window.
+        :param text: Text of the overlay.
+        :return: None
+        """
+        if self.perf_overlay is None:
+            self.perf_overlay = tk.Label(self, font=('Courier', 11), justify=tk.LEFT,
+                                         anchor='nw', fg='#f8f6f2', bg='#3d251e',
+                                         padx=8, pady=6)
+        self.perf_overlay.configure(text=text)
+        self.perf_overlay.place(relx=1.0, rely=0.0, x=-10, y=10, anchor='ne')
+        self.perf_overlay.lift()
+
+    def hide_perf_overlay(self):
+        """
+        Remove the debug overlay of timings.
+        :return: None
+        """
+        if self.perf_overlay is not None:
+            self.perf_overlay.place_forget()
+
+    def perf_overlay_shown(self):
+        """
+        Check whether the debug overlay of timings is displayed.
+        :return: True if the overlay is displayed.
+        """
+        return self.perf_overlay is not None and bool(self.perf_overlay.winfo_manager())
 
     def clear_menu(self):
         """
@@ -417,71 +588,38 @@ class YouTubeView(tk.Tk):
         Create table to display descriptive and statistic of data.
         :return: None
         """
-        df = self.controller.get_data()
-        df_to_describe = df[['subscribers', 'video views', 'uploads', 'average_monthly_earnings']]
-        summary_stats = df_to_describe.describe(percentiles=[.25, .50, .75])
-        mean = summary_stats.loc['mean'].to_list()
-        std = summary_stats.loc['std'].to_list()
-        min_val = summary_stats.loc['min'].to_list()
-        max_val = summary_stats.loc['max'].to_list()
         attribute = ['Subscribers', 'Video views', 'Uploaded videos', 'Average monthly earnings']
-        header1 = tk.Label(self.table_frame, text="Attribute", padx=10,
-                           pady=5, borderwidth=1, relief="solid",
-                           width=15, height=2, font=('BM Jua', 20),
-                           bg='#f1e8d7', fg='#cd3c3c')
-        header2 = tk.Label(self.table_frame, text="Mean", padx=10,
-                           pady=5, borderwidth=1, relief="solid",
-                           width=15, height=2, font=('BM Jua', 20),
-                           bg='#f1e8d7', fg='#cd3c3c')
-        header3 = tk.Label(self.table_frame, text="Std", padx=10,
-                           pady=5, borderwidth=1, relief="solid",
-                           width=15, height=2, font=('BM Jua', 20),
-                           bg='#f1e8d7', fg='#cd3c3c')
-        header4 = tk.Label(self.table_frame, text="Min", padx=10,
-                           pady=5, borderwidth=1, relief="solid",
-                           width=15, height=2, font=('BM Jua', 20),
-                           bg='#f1e8d7', fg='#cd3c3c')
-        header5 = tk.Label(self.table_frame, text="Max", padx=10,
-                           pady=5, borderwidth=1, relief="solid",
-                           width=15, height=2, font=('BM Jua', 20),
-                           bg='#f1e8d7', fg='#cd3c3c')
-
-        header1.grid(row=0, column=0)
-        header2.grid(row=0, column=1)
-        header3.grid(row=0, column=2)
-        header4.grid(row=0, column=3)
-        header5.grid(row=0, column=4)
-
+        headers = ['Attribute', 'Mean', 'Std', 'Median', 'Min', 'Max']
+        for column, text in enumerate(headers):
+            header = tk.Label(self.table_frame, text=text, padx=10,
+                              pady=5, borderwidth=1, relief="solid",
+                              width=15, height=2, font=('BM Jua', 20),
+                              bg='#f1e8d7', fg='#cd3c3c')
+            header.grid(row=0, column=column)
+
+        self.table_labels = {}
         for i, attr in enumerate(attribute):
             label_attr = tk.Label(self.table_frame, text=attr,
                                   padx=10, pady=5, borderwidth=1,
                                   width=15, height=2, font=('BM Jua', 18),
                                   fg='#3d251e')
             label_attr.grid(row=i + 1, column=0)
-
-            label_mean = tk.Label(self.table_frame, text=f"{mean[i]:.4f}",
-                                  padx=10, pady=5, borderwidth=1,
-                                  width=15, height=2, font=('BM Jua', 18),
-                                  fg='#3d251e')
-            label_mean.grid(row=i + 1, column=1)
-
-            label_std = tk.Label(self.table_frame, text=f"{std[i]:.4f}",
-                                 padx=10, pady=5, borderwidth=1,
+            for column, stat in enumerate(['mean', 'std', '50%', 'min', 'max']):
+                label = tk.Label(self.table_frame, padx=10, pady=5, borderwidth=1,
                                  width=15, height=2, font=('BM Jua', 18),
                                  fg='#3d251e')
-            label_std.grid(row=i + 1, column=2)
+                label.grid(row=i + 1, column=column + 1)
+                self.table_labels[(i, stat)] = label
+        self.refresh_table()
 
-            label_min = tk.Label(self.table_frame, text=f"{min_val[i]:.4f}",
-                                 padx=10, pady=5, borderwidth=1,
-                                 width=15, height=2, font=('BM Jua', 18),
-                                 fg='#3d251e')
-            label_min.grid(row=i + 1, column=3)
-
-            label_max = tk.Label(self.table_frame, text=f"{max_val[i]:.4f}",
-                                 padx=10, pady=5, borderwidth=1,
-                                 width=15, height=2, font=('BM Jua', 18),
-                                 fg='#3d251e')
-            label_max.grid(row=i + 1, column=4)
+    def refresh_table(self):
+        """
+        Update values of the descriptive table in place from the current statistics.
+        :return: None
+        """
+        summary_stats = self.controller.get_summary()
+        for (i, stat), label in self.table_labels.items():
+            label.configure(text=f"{summary_stats.iloc[:, i].loc[stat]:.4f}")
 
     def show_table(self):
         """